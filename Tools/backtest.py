@@ -1,9 +1,17 @@
+import numpy as np
 import pandas as pd
-import yfinance as yf
+
+# Custom
+from Tools.intraday import Bars, get_sessions
+from Tools.result_cache import data_version
 
 
 class Backtest:
-    def __init__(self) -> None:
+    def __init__(self, cache=None, ticker: str = "") -> None:
+        # Optional 'ResultCache' for 'get_probability'. Entries are scoped by 'ticker'
+        # plus the caller's 'scope' (e.g. the period), or the slice's first bar.
+        self.cache = cache
+        self.ticker = ticker.upper()
 
         # Formats
         self.decimal_format = "{:,.2f}"
@@ -25,21 +33,33 @@ class Backtest:
             for y in years_ago:
                 candle_section = candles.loc[candles.index >= y]
                 prob_data = self.backtest_call(
-                    candle_section, window, strike_price, option_side=option_side
+                    candle_section,
+                    window,
+                    strike_price,
+                    option_side=option_side,
+                    scope=f"{years[index]}y",
                 )
                 data[years[index]] = prob_data
                 index += 1
-            data["max"] = self.backtest_call(candles, window, strike_price, option_side)
+            data["max"] = self.backtest_call(
+                candles, window, strike_price, option_side, scope="max"
+            )
         elif option_type == "put":
             index = 0
             for y in years_ago:
                 candle_section = candles.loc[candles.index >= y]
                 prob_data = self.backtest_put(
-                    candle_section, window, strike_price, option_side=option_side
+                    candle_section,
+                    window,
+                    strike_price,
+                    option_side=option_side,
+                    scope=f"{years[index]}y",
                 )
                 data[years[index]] = prob_data
                 index += 1
-            data["max"] = self.backtest_put(candles, window, strike_price, option_side)
+            data["max"] = self.backtest_put(
+                candles, window, strike_price, option_side, scope="max"
+            )
 
         df = pd.DataFrame.from_dict(data, orient="index")[
             ["total", "match", "distance", "probability"]
@@ -50,16 +70,69 @@ class Backtest:
 
     def backtest_0dte(
         self,
-        candles: pd.DataFrame,
+        candles,
         strike_price: float,
         option_type: str,
         option_side: str,
         manual_stock_price: float = 0,
+        chunk_size: int = 1_000_000,
     ):
-        prob = self.get_probability(
-            candles, 0, strike_price, option_type, option_side, manual_stock_price
-        )
-        return prob
+        """
+        Backtest a contract that expires at today's close.
+
+        Every session is one sample: the change from its open to its lowest low (puts)
+        or highest high (calls). Session extremes are computed with a chunked scan, so
+        'candles' can be a memory-mapped multi-year intraday history.
+
+        Parameters
+        ----------
+        candles : pd.DataFrame | Bars
+            Intraday (or daily) OHLC candles, or 'Bars' loaded from a 'BarStore'.
+        strike_price : float
+            Strike price of the contract
+        option_type : str
+            "call" or "put"
+        option_side : str
+            Whether you are buying or selling the option. "buy" or "sell"
+        manual_stock_price : float, optional
+            Override calculations with a manual stock price if data feeds are unavailable. If 0, it will use last price from data feed, by default 0
+        chunk_size : int, optional
+            Bars scanned at a time, by default 1,000,000
+
+        Returns
+        -------
+        pd.DataFrame
+            Probability data, as returned by 'get_probability'.
+        """
+        if option_type not in ["call", "put"]:
+            raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+        bars = candles if isinstance(candles, Bars) else Bars.from_frame(candles)
+        sessions = get_sessions(bars, chunk_size)
+        if manual_stock_price == 0:
+            last_price = bars["Close"][-1]
+        else:
+            last_price = manual_stock_price
+        strike_spread = self.percentage_handling(last_price, strike_price)
+        anchor = sessions["open"].to_numpy(dtype=float)
+        if option_type == "put":
+            change = (sessions["low"].to_numpy(dtype=float) - anchor) / np.abs(anchor)
+            match = int(np.count_nonzero(change < strike_spread))
+        elif option_type == "call":
+            change = (sessions["high"].to_numpy(dtype=float) - anchor) / np.abs(anchor)
+            match = int(np.count_nonzero(change > strike_spread))
+        probability = match / len(sessions)
+        if option_side == "sell":
+            probability = 1 - probability
+        probability_data = {
+            "total": len(sessions),
+            "match": match,
+            "distance": self.decimal_format.format(strike_spread),
+            "probability": probability,
+            "p%": self.decimal_format.format(probability * 100),
+        }
+        df = pd.DataFrame([probability_data]).T
+        df.columns = ["Value"]
+        return df
 
     """------------- Puts -------------"""
 
@@ -70,6 +143,7 @@ class Backtest:
         strike_price: float,
         option_side: str,
         manual_stock_price: float = 0,
+        scope: str = "",
     ):
         """
         Backtest the a put option.
@@ -86,6 +160,8 @@ class Backtest:
             Whether you are buying or selling the option. "buy" or "sell"
         manual_stock_price : float, optional
             Override calculations with a manual stock price if data feeds are unavailable. If 0, it will use last price from data feed, by default 0
+        scope : str, optional
+            Cache scope within 'self.ticker' for these candles, e.g. their period, by default ""
 
         Returns
         -------
@@ -93,7 +169,7 @@ class Backtest:
             Dictionary containing probability data.
         """
         prob = self.get_probability(
-            candles, dte, strike_price, "put", option_side, manual_stock_price
+            candles, dte, strike_price, "put", option_side, manual_stock_price, scope
         )
         return prob
 
@@ -106,6 +182,7 @@ class Backtest:
         strike_price: float,
         option_side: str,
         manual_stock_price: float = 0,
+        scope: str = "",
     ):
         """
         Backtest the a call option.
@@ -122,6 +199,8 @@ class Backtest:
             Whether you are buying or selling the option. "buy" or "sell"
         manual_stock_price : float, optional
             Override calculations with a manual stock price if data feeds are unavailable. If 0, it will use last price from data feed, by default 0
+        scope : str, optional
+            Cache scope within 'self.ticker' for these candles, e.g. their period, by default ""
 
         Returns
         -------
@@ -129,7 +208,7 @@ class Backtest:
             Dictionary containing probability data.
         """
         prob = self.get_probability(
-            candles, dte, strike_price, "call", option_side, manual_stock_price
+            candles, dte, strike_price, "call", option_side, manual_stock_price, scope
         )
         return prob
 
@@ -143,7 +222,61 @@ class Backtest:
         option_type: str,
         option_side: str,
         manual_stock_price: float = 0,
+        scope: str = "",
     ):
+        if self.cache is None:
+            probability_data = self.calculate_probability(
+                candles,
+                window,
+                strike_price,
+                option_type,
+                option_side,
+                manual_stock_price,
+            )
+        else:
+            if manual_stock_price == 0:
+                last_price = candles["Close"].iloc[-1]
+            else:
+                last_price = manual_stock_price
+            strike_spread = self.percentage_handling(last_price, strike_price)
+            if not scope:
+                # No scope given: identify the slice by its first bar. Rolling slices
+                # get a new scope every day and are only removed by LRU eviction.
+                scope = f"{candles.index[0]}:{candles['Close'].iloc[0]}"
+            scope = f"Backtest:{self.ticker}:{scope}"
+            params = {
+                "last_bar": str(candles.index[-1]),
+                "window": window,
+                "strike_spread": round(float(strike_spread), 10),
+                "option_type": option_type,
+                "option_side": option_side,
+            }
+            probability_data = self.cache.get_or_compute(
+                scope,
+                data_version(candles),
+                params,
+                lambda: self.calculate_probability(
+                    candles,
+                    window,
+                    strike_price,
+                    option_type,
+                    option_side,
+                    manual_stock_price,
+                ),
+            )
+        df = pd.DataFrame([probability_data]).T
+        df.columns = ["Value"]
+        return df
+
+    def calculate_probability(
+        self,
+        candles: pd.DataFrame,
+        window: int,
+        strike_price: float,
+        option_type: str,
+        option_side: str,
+        manual_stock_price: float = 0,
+    ) -> dict:
         i = 0
         window += 1
         data = {
@@ -217,9 +350,7 @@ class Backtest:
             "probability": probability,
             "p%": self.decimal_format.format(probability * 100),
         }
-        df = pd.DataFrame([probability_data]).T
-        df.columns = ["Value"]
-        return df
+        return probability_data
 
     """------------- Dictionary Sorting -------------"""
 
@@ -0,0 +1,103 @@
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+# Cold import budget in seconds for the modules used by short CLI and worker runs.
+IMPORT_BUDGET = 1.5
+# Heavy modules that must not be loaded just by importing the package.
+DEFERRED_MODULES = ["yfinance", "scipy.stats"]
+
+
+def measure_import(module: str, repeat: int = 3) -> dict:
+    """
+    Time a cold import of 'module' in a fresh interpreter.
+
+    Returns
+    -------
+    dict
+        Best time in seconds and the deferred modules that were loaded anyway.
+    """
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - t)\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))\n"
+    )
+    times = []
+    loaded = ""
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        times.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ""
+    return {"module": module, "seconds": min(times), "loaded": loaded}
+
+
+def benchmark_imports(modules: list = None) -> list:
+    if modules is None:
+        modules = ["Tools.options_chain", "Tools.backtest", "Tools.cli"]
+    return [measure_import(m) for m in modules]
+
+
+def benchmark_greeks(n: int = 100000) -> dict:
+    from Tools.options_chain import OptionsChain
+
+    rng = np.random.default_rng(0)
+    S = 100.0
+    K = rng.uniform(50, 150, n)
+    T = rng.integers(1, 365, n) / 365
+    sigma = rng.uniform(0.1, 0.8, n)
+    # Greek methods only use their arguments, so no chain needs to be downloaded.
+    oc = OptionsChain.__new__(OptionsChain)
+    # Warm up so the lazy scipy.special import is not timed.
+    oc.calculate_delta(S, K[:10], T[:10], 0.04, sigma[:10], "put")
+    t = time.perf_counter()
+    oc.calculate_delta(S, K, T, 0.04, sigma, "put")
+    oc.calculate_gamma(S, K, T, 0.04, sigma)
+    oc.calculate_theta(S, K, T, 0.04, sigma, "put")
+    oc.calculate_vega(S, K, T, 0.04, sigma)
+    seconds = time.perf_counter() - t
+    return {"contracts": n, "seconds": seconds, "contracts/s": n / seconds}
+
+
+def benchmark_american(n: int = 5000, steps: int = 100) -> dict:
+    from Tools.binomial import calculate_american
+
+    rng = np.random.default_rng(0)
+    K = rng.uniform(50, 150, n)
+    T = rng.integers(1, 365, n) / 365
+    sigma = rng.uniform(0.1, 0.8, n)
+    calculate_american(100.0, K[:10], T[:10], 0.04, sigma[:10], "put", 0.02, steps)
+    t = time.perf_counter()
+    calculate_american(100.0, K, T, 0.04, sigma, "put", 0.02, steps)
+    seconds = time.perf_counter() - t
+    return {"contracts": n, "steps": steps, "seconds": seconds, "contracts/s": n / seconds}
+
+
+if __name__ == "__main__":
+    failed = False
+    for result in benchmark_imports():
+        status = "OK"
+        if result["seconds"] > IMPORT_BUDGET or result["loaded"]:
+            status = "OVER BUDGET"
+            failed = True
+        print(
+            f"import {result['module']}: {result['seconds']:.3f}s "
+            f"(budget {IMPORT_BUDGET}s) {status} {result['loaded']}"
+        )
+    greeks = benchmark_greeks()
+    print(
+        f"Greeks: {greeks['contracts']} contracts in {greeks['seconds']:.4f}s "
+        f"({greeks['contracts/s']:,.0f} contracts/s)"
+    )
+    american = benchmark_american()
+    print(
+        f"American ({american['steps']} steps): {american['contracts']} contracts in "
+        f"{american['seconds']:.4f}s ({american['contracts/s']:,.0f} contracts/s)"
+    )
+    sys.exit(1 if failed else 0)
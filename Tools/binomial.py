@@ -0,0 +1,130 @@
+import numpy as np
+
+# Custom
+from Tools import black_scholes as bs
+
+
+# Lowest volatility priced on the lattice.
+MIN_SIGMA = 1e-3
+
+def calculate_american(
+    S,
+    K,
+    T,
+    r,
+    sigma,
+    option_type="put",
+    q=0.0,
+    steps: int = 100,
+    vega_bump: float = 0.01,
+) -> dict:
+    """
+    Price American options and their Greeks on a Cox-Ross-Rubinstein binomial lattice
+    (Black-Scholes smoothed on the final step).
+
+    All contracts are rolled back through their trees together: every lattice level
+    is a (nodes, contracts) array, so a whole chain costs 'steps' vectorized updates
+    rather than one Python tree per contract.
+
+    Volatility is floored so the lattice stays arbitrage-free (up-move probability
+    between 0 and 1). Stale contracts are often quoted with near-zero implied
+    volatility, which would otherwise make the tree blow up.
+
+    Parameters
+    ----------
+    S : float | np.ndarray
+        Current stock price
+    K : float | np.ndarray
+        Strike price
+    T : float | np.ndarray
+        Time to expiration (in years)
+    r : float | np.ndarray
+        Risk-free interest rate
+    sigma : float | np.ndarray
+        Volatility (as a decimal, e.g., 0.25 for 25%)
+    option_type : str | np.ndarray, optional
+        "call" or "put", or an array of them, by default "put"
+    q : float | np.ndarray, optional
+        Continuous dividend yield, by default 0.0
+    steps : int, optional
+        Lattice steps. Cost grows with steps squared, by default 100
+    vega_bump : float, optional
+        Volatility bump for the finite-difference vega, by default 0.01
+
+    Returns
+    -------
+    dict
+        "price", "delta", "gamma", "theta" (per calendar day) and "vega" (per 1.00 of
+        volatility), matching the units used by 'OptionsChain'.
+    """
+    base = roll_back(S, K, T, r, sigma, option_type, q, steps)
+    bumped = roll_back(S, K, T, r, np.asarray(sigma) + vega_bump, option_type, q, steps)
+    base["vega"] = (bumped["price"] - base["price"]) / vega_bump
+    return base
+
+
+def roll_back(S, K, T, r, sigma, option_type, q, steps: int) -> dict:
+    if steps < 4:
+        raise ValueError("steps must be at least 4.")
+    S, K, T, r, sigma, q = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (S, K, T, r, sigma, q))
+    )
+    if isinstance(option_type, str):
+        if option_type not in ["call", "put"]:
+            raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+        is_call = np.full(S.shape, option_type == "call")
+    else:
+        is_call = np.broadcast_to(np.asarray(option_type) == "call", S.shape)
+    # Lattice levels are (nodes, contracts) arrays. Slicing the leading axis keeps
+    # every level contiguous, and all updates below are done in place.
+    T = np.maximum(T, 1 / 365)
+    sign = np.where(is_call, 1.0, -1.0)
+    dt = T / steps
+    # CRR needs sigma * sqrt(dt) > |r - q| * dt, or 'p' leaves [0, 1].
+    sigma = np.maximum(sigma, np.maximum(2 * np.abs(r - q) * np.sqrt(dt), MIN_SIGMA))
+    u = np.exp(sigma * np.sqrt(dt))
+    d = 1 / u
+    p = (np.exp((r - q) * dt) - d) / (u - d)
+    discount = np.exp(-r * dt)
+    p_up = discount * p
+    p_down = discount * (1 - p)
+
+    # Nodes one step before expiration: j up moves out of 'steps - 1'. Prices and
+    # strikes are pre-multiplied by 'sign' so exercise is one subtraction for both types.
+    j = np.arange(steps)[:, None]
+    prices = S * u**j * d ** (steps - 1 - j)
+    signed_prices = sign * prices
+    signed_strike = sign * K
+    # Binomial Black-Scholes: the last step uses the European value over one 'dt',
+    # which removes most of the odd/even oscillation of a plain CRR tree.
+    european = bs.calculate_price(
+        prices * np.exp(-q * dt), K, dt, r, sigma, np.where(is_call, "call", "put")
+    )
+    values = np.maximum(european, signed_prices - signed_strike)
+    up = np.empty_like(values)
+    exercise = np.empty_like(values)
+    levels = {}
+    for i in range(steps - 2, -1, -1):
+        n = i + 1
+        v = values[:n]
+        np.multiply(values[1 : n + 1], p_up, out=up[:n])
+        v *= p_down
+        v += up[:n]
+        # Node j at level i is node j at level i + 1 moved down once.
+        signed_prices[:n] *= u
+        np.subtract(signed_prices[:n], signed_strike, out=exercise[:n])
+        # Early exercise
+        np.maximum(v, exercise[:n], out=v)
+        if i <= 2:
+            levels[i] = (signed_prices[:n] * sign, v.copy())
+
+    s1, v1 = levels[1]
+    s2, v2 = levels[2]
+    price = levels[0][1][0]
+    delta = (v1[1] - v1[0]) / (s1[1] - s1[0])
+    delta_up = (v2[2] - v2[1]) / (s2[2] - s2[1])
+    delta_down = (v2[1] - v2[0]) / (s2[1] - s2[0])
+    gamma = (delta_up - delta_down) / ((s2[2] - s2[0]) / 2)
+    # Middle node two steps ahead has the same spot, so the change is pure decay.
+    theta = (v2[1] - price) / (2 * dt) / 365
+    return {"price": price, "delta": delta, "gamma": gamma, "theta": theta}
@@ -0,0 +1,142 @@
+import numpy as np
+
+
+# ---------- Normal Distribution ---------- #
+# scipy.special is imported on first use. scipy.stats is avoided entirely, its import
+# alone costs over a second.
+def norm_cdf(x):
+    from scipy.special import ndtr
+
+    return ndtr(x)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / np.sqrt(2 * np.pi)
+
+
+def norm_ppf(p):
+    from scipy.special import ndtri
+
+    return ndtri(p)
+
+
+def calculate_d1_d2(S, K, T, r, sigma):
+    """
+    Calculate d1 and d2 of the Black-Scholes formula. Accepts scalars or arrays.
+
+    Parameters
+    ----------
+    S : float | np.ndarray
+        Current stock price
+    K : float | np.ndarray
+        Strike price
+    T : float | np.ndarray
+        Time to expiration (in years)
+    r : float | np.ndarray
+        Risk-free interest rate
+    sigma : float | np.ndarray
+        Volatility (as a decimal, e.g., 0.25 for 25%)
+
+    Returns
+    -------
+    tuple
+        (d1, d2)
+    """
+    sqrt_t = np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    return d1, d2
+
+
+def calculate_price(S, K, T, r, sigma, option_type="call"):
+    """
+    Calculate the Black-Scholes price of a European option. Accepts scalars or arrays.
+
+    Parameters
+    ----------
+    S, K, T, r, sigma
+        See 'calculate_d1_d2'.
+    option_type : str | np.ndarray, optional
+        "call" or "put", or an array of them for mixed positions, by default "call"
+
+    Returns
+    -------
+    float | np.ndarray
+        Option price per share.
+    """
+    d1, d2 = calculate_d1_d2(S, K, T, r, sigma)
+    discount = K * np.exp(-r * T)
+    call = S * norm_cdf(d1) - discount * norm_cdf(d2)
+    # Put-call parity
+    return _select(option_type, call, call - S + discount)
+
+
+def calculate_greeks(S, K, T, r, sigma, option_type="call") -> dict:
+    """
+    Calculate delta, gamma, theta and vega in one pass. Accepts scalars or arrays.
+
+    Units match 'OptionsChain': theta is per calendar day, vega per 1.00 of volatility.
+
+    Parameters
+    ----------
+    S, K, T, r, sigma
+        See 'calculate_d1_d2'.
+    option_type : str | np.ndarray, optional
+        "call" or "put", or an array of them for mixed positions, by default "call"
+
+    Returns
+    -------
+    dict
+        "delta", "gamma", "theta" and "vega".
+    """
+    d1, d2 = calculate_d1_d2(S, K, T, r, sigma)
+    sqrt_t = np.sqrt(T)
+    pdf = norm_pdf(d1)
+    discount = K * np.exp(-r * T)
+    decay = -S * pdf * sigma / (2 * sqrt_t)
+    call_delta = norm_cdf(d1)
+    call_theta = decay - r * discount * norm_cdf(d2)
+    return {
+        "delta": _select(option_type, call_delta, call_delta - 1),
+        "gamma": pdf / (S * sigma * sqrt_t),
+        "theta": _select(option_type, call_theta, call_theta + r * discount) / 365,
+        "vega": S * pdf * sqrt_t,
+    }
+
+
+def _select(option_type, call, put):
+    if isinstance(option_type, str):
+        if option_type == "call":
+            return call
+        elif option_type == "put":
+            return put
+        raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+    return np.where(np.asarray(option_type) == "call", call, put)
+
+
+def calculate_strike_from_delta(S, delta, T, r, sigma, option_type: str = "call"):
+    """
+    Invert Black-Scholes delta to find the strike with a given delta.
+
+    Parameters
+    ----------
+    S, T, r, sigma
+        See 'calculate_d1_d2'.
+    delta : float | np.ndarray
+        Absolute delta target, e.g. 0.30 for a 30 delta put or call.
+    option_type : str, optional
+        "call" or "put", by default "call"
+
+    Returns
+    -------
+    float | np.ndarray
+        Strike price.
+    """
+    if option_type == "call":
+        d1 = norm_ppf(delta)
+    elif option_type == "put":
+        d1 = norm_ppf(1 - delta)
+    else:
+        raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+    sqrt_t = np.sqrt(T)
+    return S * np.exp((r + 0.5 * sigma**2) * T - d1 * sigma * sqrt_t)
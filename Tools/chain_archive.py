@@ -0,0 +1,315 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Custom
+from Tools.data_source import OptionChain
+from Tools.volatility_surface import VolatilitySurface
+
+
+# Raw chain columns stored as float32. Read back rounded to 'PRICE_DECIMALS'.
+PRICE_COLUMNS = ["lastPrice", "bid", "ask", "change", "percentChange"]
+PRICE_DECIMALS = 4
+# Repeated strings stored as dictionary indices.
+DICTIONARY_COLUMNS = ["contractSymbol", "option_type", "contractSize", "currency"]
+SORT_COLUMNS = ["expiration", "option_type", "strike", "snapshot"]
+
+
+def import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("The chain archive requires pyarrow: pip install pyarrow")
+    return pa, ds, pq
+
+
+class ChainArchive:
+    def __init__(self, root: str, row_group_size: int = 50_000) -> None:
+        """
+        Archive of raw option chain snapshots in Parquet, partitioned by ticker and date.
+
+        Layout: root/ticker=F/date=2024-01-31/<time>-<expiration>.parquet. Each
+        snapshot is one file. 'compact' merges a day into one sorted file, whose row
+        group statistics let reads skip expirations and strikes they do not need.
+        Requires pyarrow, imported on first use.
+
+        Parameters
+        ----------
+        root : str
+            Archive directory.
+        row_group_size : int, optional
+            Rows per row group when compacting, by default 50,000
+        """
+        self.root = root
+        self.row_group_size = row_group_size
+        self.date_format = "%Y-%m-%d"
+
+    # ---------- Write ---------- #
+    def to_table(self, ticker: str, chain, stock_price: float, snapshot: pd.Timestamp):
+        pa, _, _ = import_pyarrow()
+        df = pd.concat(
+            [chain.calls.assign(option_type="call"), chain.puts.assign(option_type="put")],
+            ignore_index=True,
+        )
+        expiration = df["contractSymbol"].str.extract(r"(\d{6})", expand=False)
+        df["expiration"] = pd.to_datetime(expiration, format="%y%m%d").dt.date
+        df["snapshot"] = snapshot
+        df["underlying_price"] = float(stock_price)
+        for c in PRICE_COLUMNS + ["impliedVolatility"]:
+            if c in df:
+                df[c] = df[c].astype(np.float32)
+        for c in DICTIONARY_COLUMNS:
+            if c in df:
+                df[c] = df[c].astype("category")
+        df = df.sort_values(SORT_COLUMNS, ignore_index=True)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def append(self, ticker: str, chain, stock_price: float, snapshot=None) -> str:
+        """
+        Write one raw 'set_chain' snapshot.
+
+        Parameters
+        ----------
+        ticker : str
+            Underlying ticker.
+        chain : OptionChain
+            Raw chain with 'calls' and 'puts'.
+        stock_price : float
+            Underlying price at the time of the snapshot.
+        snapshot : optional
+            Snapshot time, by default now (UTC).
+
+        Returns
+        -------
+        str
+            Path of the written file.
+        """
+        _, _, pq = import_pyarrow()
+        ticker = ticker.upper()
+        snapshot = pd.Timestamp(snapshot or pd.Timestamp.now(tz="UTC"))
+        if snapshot.tzinfo is None:
+            snapshot = snapshot.tz_localize("UTC")
+        table = self.to_table(ticker, chain, stock_price, snapshot)
+        directory = self.get_partition(ticker, snapshot.strftime(self.date_format))
+        os.makedirs(directory, exist_ok=True)
+        expirations = table.column("expiration").to_pandas()
+        name = snapshot.strftime("%H%M%S%f")
+        if len(expirations):
+            name += "-" + expirations.min().strftime("%Y%m%d")
+        path = os.path.join(directory, f"{name}.parquet")
+        pq.write_table(table, path, use_dictionary=DICTIONARY_COLUMNS, compression="zstd")
+        return path
+
+    def get_partition(self, ticker: str, date: str) -> str:
+        return os.path.join(self.root, f"ticker={ticker.upper()}", f"date={date}")
+
+    def compact(self, ticker: str, date: str) -> str:
+        """
+        Merge one day's snapshot files into a single sorted file.
+        """
+        pa, ds, pq = import_pyarrow()
+        directory = self.get_partition(ticker, date)
+        files = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".parquet")
+        )
+        if len(files) < 2:
+            return files[0] if files else ""
+        df = ds.dataset(files, format="parquet").to_table().to_pandas()
+        df = df.sort_values(SORT_COLUMNS, ignore_index=True)
+        for c in DICTIONARY_COLUMNS:
+            if c in df:
+                df[c] = df[c].astype("category")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        path = os.path.join(directory, "compacted.parquet.tmp")
+        pq.write_table(
+            table,
+            path,
+            row_group_size=self.row_group_size,
+            use_dictionary=DICTIONARY_COLUMNS,
+            compression="zstd",
+        )
+        for f in files:
+            os.remove(f)
+        final = os.path.join(directory, "compacted.parquet")
+        os.replace(path, final)
+        return final
+
+    # ---------- Read ---------- #
+    def get_dataset(self):
+        pa, ds, _ = import_pyarrow()
+        partitioning = ds.partitioning(
+            pa.schema([("ticker", pa.string()), ("date", pa.string())]), flavor="hive"
+        )
+        return ds.dataset(self.root, format="parquet", partitioning=partitioning)
+
+    def get_filter(self, ticker: str = "", start: str = "", end: str = "", filters=None):
+        _, ds, pq = import_pyarrow()
+        expression = None
+        conditions = []
+        if ticker:
+            conditions.append(ds.field("ticker") == ticker.upper())
+        if start:
+            conditions.append(ds.field("date") >= start)
+        if end:
+            conditions.append(ds.field("date") <= end)
+        if filters is not None:
+            if not isinstance(filters, ds.Expression):
+                filters = pq.filters_to_expression(filters)
+            conditions.append(filters)
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read(
+        self,
+        ticker: str = "",
+        start: str = "",
+        end: str = "",
+        filters=None,
+        columns: list = None,
+    ) -> pd.DataFrame:
+        """
+        Read archived rows. Ticker and date bounds prune partitions, and 'filters'
+        are pushed down to Parquet row group statistics.
+
+        Parameters
+        ----------
+        ticker : str, optional
+            Only this ticker, by default all
+        start : str, optional
+            First snapshot date "%Y-%m-%d", inclusive, by default no bound
+        end : str, optional
+            Last snapshot date "%Y-%m-%d", inclusive, by default no bound
+        filters : list | pyarrow.dataset.Expression, optional
+            Extra predicates, e.g. [("option_type", "==", "put"), ("strike", "<", 10)]
+        columns : list, optional
+            Columns to load, by default all
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        if not os.path.isdir(self.root):
+            return pd.DataFrame()
+        expression = self.get_filter(ticker, start, end, filters)
+        table = self.get_dataset().to_table(columns=columns, filter=expression)
+        df = table.to_pandas()
+        for c in PRICE_COLUMNS:
+            if c in df:
+                df[c] = df[c].astype(float).round(PRICE_DECIMALS)
+        if "impliedVolatility" in df:
+            df["impliedVolatility"] = df["impliedVolatility"].astype(float)
+        for c in DICTIONARY_COLUMNS + ["ticker", "date"]:
+            if c in df:
+                df[c] = df[c].astype(str)
+        return df
+
+    # ---------- Replay ---------- #
+    def snapshots(self, ticker: str, start: str = "", end: str = "", filters=None):
+        """
+        Yield (snapshot time, underlying price, OptionChain) in time order.
+        """
+        df = self.read(ticker, start, end, filters)
+        for snapshot, _, stock_price, chain in self.split(df):
+            yield snapshot, stock_price, chain
+
+    def split(self, df: pd.DataFrame):
+        """
+        Yield (snapshot time, expiration, underlying price, OptionChain) for each
+        archived chain in 'df', in time order.
+        """
+        if df.empty:
+            return
+        raw = [c for c in df.columns if c not in ["ticker", "date", "expiration"]]
+        for (snapshot, expiration), group in df.groupby(["snapshot", "expiration"], sort=True):
+            stock_price = group["underlying_price"].iloc[0]
+            group = group[raw].drop(columns=["snapshot", "underlying_price"])
+            calls = group[group["option_type"] == "call"].drop(columns="option_type")
+            puts = group[group["option_type"] == "put"].drop(columns="option_type")
+            chain = OptionChain(
+                calls.reset_index(drop=True), puts.reset_index(drop=True), {}
+            )
+            yield snapshot, expiration, stock_price, chain
+
+    def get_volatility_surface(
+        self, day: pd.DataFrame, snapshot, stock_price: float, risk_free_rate: float
+    ) -> VolatilitySurface:
+        """
+        Surface from one day's archived chains as they stood at 'snapshot': the latest
+        snapshot of each expiration taken at or before it.
+        """
+        day = day[day["snapshot"] <= snapshot]
+        day = day[day["snapshot"] == day.groupby("expiration")["snapshot"].transform("max")]
+        chains = {str(e): chain for _, e, _, chain in self.split(day)}
+        return VolatilitySurface(
+            day["ticker"].iloc[0],
+            stock_price,
+            chains,
+            risk_free_rate,
+            snapshot.strftime(self.date_format),
+        )
+
+    def replay(
+        self,
+        options_chain,
+        option_type: str = "put",
+        start: str = "",
+        end: str = "",
+        filters=None,
+    ):
+        """
+        Feed archived snapshots through 'options_chain.apply_peripherals' as if live.
+
+        Spot and dates come from each snapshot, so days to expiration, backtest windows
+        and strike distances are measured from the snapshot. With 'use_surface', the
+        surface is fitted to the chains archived that day up to the snapshot (after
+        'filters'), not fetched live. The risk-free rate, candle history and realized
+        volatility come from 'options_chain' as it is now.
+
+        Parameters
+        ----------
+        options_chain : OptionsChain
+            Chain for the same ticker. Its state is restored after each snapshot.
+        option_type : str, optional
+            "call" or "put", by default "put"
+        start, end : str, optional
+            Snapshot date bounds "%Y-%m-%d"
+        filters : optional
+            Extra predicates, see 'read'
+
+        Yields
+        ------
+        tuple
+            (snapshot time, DataFrame with the same columns as 'get_calls'/'get_puts')
+        """
+        if option_type not in ["call", "put"]:
+            raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+        oc = options_chain
+        archived = self.read(oc.ticker, start, end, filters)
+        days = dict(tuple(archived.groupby("date"))) if oc.use_surface else {}
+        for snapshot, _, stock_price, chain in self.split(archived):
+            state = (oc.option_chain, oc.stock_price, oc.current_date, oc.volatility_surface)
+            oc.option_chain = chain
+            oc.stock_price = stock_price
+            oc.current_date = snapshot.date()
+            try:
+                if oc.use_surface:
+                    oc.volatility_surface = self.get_volatility_surface(
+                        days[snapshot.strftime(self.date_format)],
+                        snapshot,
+                        stock_price,
+                        oc.get_risk_free_rate(),
+                    )
+                data = chain.calls if option_type == "call" else chain.puts
+                df = oc.apply_peripherals(data.copy(), option_type, oc.use_surface, oc.pricing)
+            finally:
+                (
+                    oc.option_chain,
+                    oc.stock_price,
+                    oc.current_date,
+                    oc.volatility_surface,
+                ) = state
+            yield snapshot, df
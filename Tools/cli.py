@@ -0,0 +1,295 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+# Custom
+from Tools.backtest import Backtest
+from Tools.data_source import YahooDataSource
+from Tools.options_chain import OptionsChain
+
+
+# Candles downloaded by this process, keyed by ticker. Reused across tasks.
+_candles = {}
+
+
+# ---------- Tasks ---------- #
+def read_tasks(path: str) -> list:
+    """
+    Read the task list. CSV with a header row.
+
+    "chain" mode columns: ticker, option_type, expiration (optional).
+    "probability" mode columns: ticker, strike, dte, option_type, option_side.
+    """
+    df = pd.read_csv(path, dtype=str).fillna("")
+    return df.to_dict(orient="records")
+
+
+def task_key(task: dict) -> str:
+    return "|".join(str(v) for v in task.values())
+
+
+def run_chain(task: dict) -> list:
+    option_type = task.get("option_type", "put") or "put"
+    oc = OptionsChain(
+        task["ticker"],
+        call=option_type == "call",
+        put=option_type == "put",
+        expiration_date=task.get("expiration", ""),
+        buy=False,
+        sell=True,
+    )
+    df = oc.get_calls() if option_type == "call" else oc.get_puts()
+    df.insert(0, "ticker", oc.ticker)
+    return json.loads(df.to_json(orient="records"))
+
+
+def run_probability(task: dict) -> list:
+    ticker = task["ticker"].upper()
+    if ticker not in _candles:
+        _candles[ticker] = YahooDataSource().download(ticker)
+    df = Backtest().get_probability(
+        _candles[ticker],
+        int(task["dte"]),
+        float(task["strike"]),
+        task.get("option_type", "put") or "put",
+        task.get("option_side", "sell") or "sell",
+    )
+    row = dict(task)
+    row.update(df["Value"].to_dict())
+    return [row]
+
+
+def run_task(mode: str, task: dict):
+    if mode == "chain":
+        return task, run_chain(task)
+    elif mode == "probability":
+        return task, run_probability(task)
+    raise ValueError("Invalid mode. Use 'chain' or 'probability'.")
+
+
+# ---------- Writers ---------- #
+class CsvWriter:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = None
+        self.writer = None
+
+    def write(self, rows: list, key: str = "") -> list:
+        """
+        Write 'rows' and return the task keys whose rows are now on disk.
+        """
+        if not rows:
+            return [key] if key else []
+        if self.writer is None:
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self.file = open(self.path, "a", newline="")
+            self.writer = csv.DictWriter(
+                self.file, fieldnames=list(rows[0]), extrasaction="ignore"
+            )
+            if new:
+                self.writer.writeheader()
+        self.writer.writerows(rows)
+        self.file.flush()
+        return [key] if key else []
+
+    def close(self) -> list:
+        if self.file is not None:
+            self.file.close()
+        return []
+
+
+class JsonlWriter:
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "a")
+
+    def write(self, rows: list, key: str = "") -> list:
+        for row in rows:
+            self.file.write(json.dumps(row, default=str) + "\n")
+        self.file.flush()
+        return [key] if key else []
+
+    def close(self) -> list:
+        self.file.close()
+        return []
+
+
+class ParquetWriter:
+    def __init__(self, path: str, row_group_size: int = 10000) -> None:
+        """
+        Buffer rows and flush every 'row_group_size' rows as a complete Parquet file.
+        Requires pyarrow.
+
+        A Parquet file is unreadable until its footer is written, so each flush writes
+        its own file ('path', then the next free 'name.N.parquet') and only then reports
+        the buffered task keys as written. A killed run loses at most the buffer, and
+        those tasks are rerun on resume.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.keys = []
+        self.schema = None
+
+    def get_path(self) -> str:
+        root, ext = os.path.splitext(self.path)
+        path = self.path
+        i = 0
+        while os.path.exists(path):
+            i += 1
+            path = f"{root}.{i}{ext}"
+        return path
+
+    def write(self, rows: list, key: str = "") -> list:
+        self.buffer.extend(rows)
+        if key:
+            self.keys.append(key)
+        if len(self.buffer) >= self.row_group_size:
+            return self.flush()
+        return []
+
+    def flush(self) -> list:
+        if self.buffer:
+            table = self.pa.Table.from_pylist(self.buffer)
+            if self.schema is None:
+                self.schema = table.schema
+            path = self.get_path()
+            # Write under a temporary name so a partial file is never picked up.
+            self.pq.write_table(table.cast(self.schema), path + ".tmp")
+            os.replace(path + ".tmp", path)
+        keys = self.keys
+        self.buffer = []
+        self.keys = []
+        return keys
+
+    def close(self) -> list:
+        return self.flush()
+
+
+def get_writer(path: str, output_format: str):
+    if output_format == "csv":
+        return CsvWriter(path)
+    elif output_format == "jsonl":
+        return JsonlWriter(path)
+    elif output_format == "parquet":
+        return ParquetWriter(path)
+    raise ValueError("Invalid format. Use 'csv', 'jsonl' or 'parquet'.")
+
+
+# ---------- Checkpoint ---------- #
+def read_checkpoint(path: str) -> set:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(line.rstrip("\n") for line in f)
+
+
+# ---------- Runner ---------- #
+def run(
+    mode: str,
+    input_path: str,
+    output_path: str,
+    output_format: str = "csv",
+    workers: int = 1,
+    checkpoint: str = "",
+):
+    """
+    Run every task in 'input_path' and write rows to 'output_path' as they complete.
+
+    Completed task keys are appended to 'checkpoint' only once the writer reports
+    their rows as on disk, so an interrupted run restarted with the same checkpoint
+    skips finished tasks and reruns the rest.
+
+    Returns
+    -------
+    dict
+        Counts of completed, skipped and failed tasks.
+    """
+    done = read_checkpoint(checkpoint)
+    all_tasks = read_tasks(input_path)
+    tasks = [t for t in all_tasks if task_key(t) not in done]
+    summary = {"completed": 0, "skipped": len(all_tasks) - len(tasks), "failed": 0}
+    writer = get_writer(output_path, output_format)
+    log = open(checkpoint, "a") if checkpoint else None
+
+    def record(keys: list):
+        if log is not None and keys:
+            log.writelines(k + "\n" for k in keys)
+            log.flush()
+
+    def finish(task, rows):
+        record(writer.write(rows, task_key(task)))
+        summary["completed"] += 1
+
+    try:
+        if workers <= 1:
+            for task in tasks:
+                try:
+                    finish(*run_task(mode, task))
+                except Exception as e:
+                    summary["failed"] += 1
+                    print(f"Failed {task_key(task)}: {e}", file=sys.stderr)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = {}
+                queue = iter(tasks)
+                # Keep a bounded number of tasks in flight.
+                for task in queue:
+                    pending[pool.submit(run_task, mode, task)] = task
+                    if len(pending) >= workers * 2:
+                        break
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        task = pending.pop(future)
+                        try:
+                            finish(*future.result())
+                        except Exception as e:
+                            summary["failed"] += 1
+                            print(f"Failed {task_key(task)}: {e}", file=sys.stderr)
+                        nxt = next(queue, None)
+                        if nxt is not None:
+                            pending[pool.submit(run_task, mode, nxt)] = nxt
+    finally:
+        record(writer.close())
+        if log is not None:
+            log.close()
+    return summary
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Batch options analytics.")
+    parser.add_argument("mode", choices=["chain", "probability"])
+    parser.add_argument("input", help="CSV task list.")
+    parser.add_argument("output", help="Output file.")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], default="")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--checkpoint", default="", help="File recording completed tasks for resume."
+    )
+    args = parser.parse_args(argv)
+    output_format = args.format or os.path.splitext(args.output)[1].lstrip(".")
+    summary = run(
+        args.mode,
+        args.input,
+        args.output,
+        output_format,
+        args.workers,
+        args.checkpoint,
+    )
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
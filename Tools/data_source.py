@@ -0,0 +1,100 @@
+from collections import namedtuple
+
+import pandas as pd
+
+
+# Same shape as the object returned by 'yf.Ticker(...).option_chain()'.
+OptionChain = namedtuple("OptionChain", ["calls", "puts", "underlying"])
+
+
+class YahooDataSource:
+    """
+    Default data source. Thin wrapper around yfinance, imported on first fetch.
+    """
+
+    @property
+    def transient_errors(self) -> tuple:
+        """
+        Errors worth retrying: network failures, timeouts and rate limiting.
+        """
+        try:
+            from yfinance.exceptions import YFRateLimitError
+        except ImportError:
+            return (OSError,)
+        return (OSError, YFRateLimitError)
+
+    def download(self, ticker: str, **kwargs) -> pd.DataFrame:
+        import yfinance as yf
+
+        return yf.download(ticker, multi_level_index=False, **kwargs)
+
+    def download_many(self, tickers: list, **kwargs) -> dict:
+        """
+        Download several tickers in one request. Returns candles keyed by ticker;
+        tickers missing from the response are omitted.
+        """
+        import yfinance as yf
+
+        df = yf.download(tickers, group_by="ticker", multi_level_index=True, **kwargs)
+        # Tickers yfinance could not fetch are left out rather than failing the batch.
+        found = set(df.columns.get_level_values(0))
+        return {t.upper(): df[t].dropna(how="all") for t in tickers if t in found}
+
+    def option_chain(self, ticker: str, expiration_date: str = ""):
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker)
+        if expiration_date == "":
+            return stock.option_chain()
+        return stock.option_chain(expiration_date)
+
+    def options(self, ticker: str) -> tuple:
+        import yfinance as yf
+
+        return yf.Ticker(ticker).options
+
+
+class FakeDataSource:
+    def __init__(self, candles: dict, chains: dict = None) -> None:
+        """
+        In-memory data source for offline use and testing.
+
+        Parameters
+        ----------
+        candles : dict
+            Candle DataFrames keyed by ticker (include "^TNX" for the risk-free rate).
+        chains : dict, optional
+            'OptionChain' tuples keyed by (ticker, expiration_date). The first entry
+            for a ticker is returned when no expiration is given, by default None
+        """
+        self.candles = {k.upper(): v for k, v in candles.items()}
+        self.chains = {(k[0].upper(), k[1]): v for k, v in (chains or {}).items()}
+        # Every request made, in order, as (method, argument) tuples.
+        self.requests = []
+
+    def get_candles(self, ticker: str, period: str = "max") -> pd.DataFrame:
+        candles = self.candles[ticker.upper()]
+        period = period.lower()
+        if period != "max" and period[-1] == "y":
+            start = candles.index[-1] - pd.DateOffset(years=int(period[:-1]))
+            candles = candles.loc[candles.index >= start]
+        return candles.copy()
+
+    def download(self, ticker: str, period: str = "max", **kwargs) -> pd.DataFrame:
+        self.requests.append(("download", ticker))
+        return self.get_candles(ticker, period)
+
+    def download_many(self, tickers: list, period: str = "max", **kwargs) -> dict:
+        self.requests.append(("download_many", tuple(tickers)))
+        return {t.upper(): self.get_candles(t, period) for t in tickers}
+
+    def option_chain(self, ticker: str, expiration_date: str = ""):
+        self.requests.append(("option_chain", ticker))
+        for (t, exp), chain in self.chains.items():
+            if t == ticker.upper() and (expiration_date in ["", exp]):
+                return OptionChain(chain.calls.copy(), chain.puts.copy(), chain.underlying)
+        raise ValueError(f"No chain for {ticker} {expiration_date}")
+
+    def options(self, ticker: str) -> tuple:
+        self.requests.append(("options", ticker))
+        return tuple(sorted(exp for t, exp in self.chains if t == ticker.upper()))
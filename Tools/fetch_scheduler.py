@@ -0,0 +1,239 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+# Custom
+from Tools.data_source import YahooDataSource
+
+
+class TokenBucket:
+    def __init__(
+        self, rate: float, capacity: int, clock=time.monotonic, sleep=time.sleep
+    ) -> None:
+        """
+        Thread-safe token bucket. 'acquire' blocks until a token is available.
+
+        Parameters
+        ----------
+        rate : float
+            Tokens added per second.
+        capacity : int
+            Maximum burst size.
+        clock : callable, optional
+            Monotonic time source, by default time.monotonic
+        sleep : callable, optional
+            Sleep function, by default time.sleep
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.tickers = []
+        self.results = {}
+        self.done = threading.Event()
+
+
+class FetchScheduler:
+    def __init__(
+        self,
+        fetcher=None,
+        rate: float = 2.0,
+        burst: int = 5,
+        retries: int = 3,
+        backoff: float = 0.5,
+        batch_window: float = 0.05,
+        max_batch: int = 50,
+        retry_on: tuple = None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ) -> None:
+        """
+        Data source wrapper that deduplicates, rate limits, retries and batches fetches.
+
+        - Single-flight: concurrent requests for the same key share one fetch.
+        - Token bucket: at most 'rate' requests per second, bursts up to 'burst'.
+        - Retries: transient failures (see 'retry_on') are retried with exponential
+          backoff and jitter. Anything else, e.g. an unknown ticker, fails at once.
+        - Batching: candle downloads with the same arguments arriving within
+          'batch_window' seconds are merged into one multi-ticker download. Tickers
+          missing from (or empty in) the batch result, or all of them if the batch
+          request fails, are downloaded on their own, so errors are per ticker.
+
+        It has the same methods as 'YahooDataSource', so it can be passed as
+        'data_source' to 'OptionsChain', 'OptionsBacktest' or 'AnalyticsService'.
+
+        Parameters
+        ----------
+        fetcher : optional
+            Underlying data source, by default 'YahooDataSource'
+        rate : float, optional
+            Requests per second, by default 2.0
+        burst : int, optional
+            Token bucket capacity, by default 5
+        retries : int, optional
+            Attempts after the first failure, by default 3
+        backoff : float, optional
+            Base delay in seconds, doubled each retry, by default 0.5
+        batch_window : float, optional
+            Seconds to collect tickers into one download. 0 disables batching,
+            by default 0.05
+        max_batch : int, optional
+            Most tickers per batched download, by default 50
+        retry_on : tuple, optional
+            Exception types worth retrying. Defaults to the fetcher's
+            'transient_errors', or (OSError,) (network errors and timeouts)
+        clock, sleep : callable, optional
+            Time functions, replaceable for testing.
+        """
+        if fetcher is None:
+            fetcher = YahooDataSource()
+        self.fetcher = fetcher
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.retries = retries
+        if retry_on is None:
+            retry_on = getattr(fetcher, "transient_errors", (OSError,))
+        self.retry_on = tuple(retry_on)
+        self.backoff = backoff
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.batches = {}
+        self.stats = {
+            "requests": 0,
+            "fetches": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "fallbacks": 0,
+        }
+
+    # ---------- Single Flight ---------- #
+    def single_flight(self, key: tuple, func):
+        """
+        Run 'func' once for all concurrent callers with the same 'key'.
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.inflight[key] = future
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return self._copy(future.result())
+        try:
+            result = func()
+            future.set_result(result)
+            return self._copy(result)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+
+    def _copy(self, result):
+        # Callers mutate candles (e.g. add a "change" column), so each gets its own frame.
+        if isinstance(result, pd.DataFrame):
+            return result.copy()
+        return result
+
+    # ---------- Rate Limit & Retry ---------- #
+    def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            with self.lock:
+                self.stats["fetches"] += 1
+            try:
+                return func(*args, **kwargs)
+            except self.retry_on:
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff * 2**attempt
+                self.sleep(delay + random.uniform(0, delay / 2))
+                attempt += 1
+                with self.lock:
+                    self.stats["retries"] += 1
+
+    # ---------- Data Source ---------- #
+    def download(self, ticker: str, **kwargs) -> pd.DataFrame:
+        kw = tuple(sorted(kwargs.items()))
+        key = ("download", ticker.upper(), kw)
+        if self.batch_window <= 0 or not hasattr(self.fetcher, "download_many"):
+            return self.single_flight(
+                key, lambda: self.call(self.fetcher.download, ticker, **kwargs)
+            )
+        return self.single_flight(key, lambda: self._batched_download(ticker, kwargs))
+
+    def _batched_download(self, ticker: str, kwargs: dict) -> pd.DataFrame:
+        kw = tuple(sorted(kwargs.items()))
+        with self.lock:
+            batch = self.batches.get(kw)
+            leader = batch is None or len(batch.tickers) >= self.max_batch
+            if leader:
+                batch = _Batch()
+                self.batches[kw] = batch
+            batch.tickers.append(ticker.upper())
+        if leader:
+            # Collect other tickers with the same arguments, then fetch them together.
+            self.sleep(self.batch_window)
+            with self.lock:
+                if self.batches.get(kw) is batch:
+                    del self.batches[kw]
+            try:
+                batch.results = self.call(
+                    self.fetcher.download_many, list(batch.tickers), **kwargs
+                )
+            except Exception:
+                # Leave every ticker to its own download below, so one bad symbol
+                # does not fail the whole batch.
+                batch.results = {}
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+        candles = batch.results.get(ticker.upper())
+        if candles is None or candles.empty:
+            # Missing from the batch: fetch alone so errors stay with this ticker.
+            with self.lock:
+                self.stats["fallbacks"] += 1
+            return self.call(self.fetcher.download, ticker, **kwargs)
+        return candles
+
+    def option_chain(self, ticker: str, expiration_date: str = ""):
+        key = ("option_chain", ticker.upper(), expiration_date)
+        return self.single_flight(
+            key, lambda: self.call(self.fetcher.option_chain, ticker, expiration_date)
+        )
+
+    def options(self, ticker: str) -> tuple:
+        key = ("options", ticker.upper())
+        return self.single_flight(key, lambda: self.call(self.fetcher.options, ticker))
@@ -0,0 +1,280 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+DAILY_INTERVALS = ["1d", "5d", "1wk", "1mo", "3mo"]
+NANOSECONDS_PER_DAY = 86_400 * 10**9
+
+
+def is_intraday(interval: str) -> bool:
+    return interval.lower() not in DAILY_INTERVALS
+
+
+def get_interval_minutes(interval: str) -> int:
+    """
+    Bar length in minutes for yfinance intervals such as "1m", "15m" or "1h".
+    """
+    interval = interval.lower()
+    if interval.endswith("m"):
+        return int(interval[:-1])
+    elif interval.endswith("h"):
+        return int(interval[:-1]) * 60
+    raise ValueError(f"Invalid intraday interval '{interval}'. Use e.g. '1m' or '1h'.")
+
+
+class Bars:
+    def __init__(self, time, columns: dict, tz: str = "UTC") -> None:
+        """
+        OHLCV bars as one array per column. Arrays may be in-memory or memory-mapped.
+
+        Parameters
+        ----------
+        time : np.ndarray
+            Bar start times as int64 nanoseconds since the epoch (UTC).
+        columns : dict
+            Arrays keyed by "Open", "High", "Low", "Close" and "Volume".
+        tz : str, optional
+            Exchange time zone, used to split bars into sessions, by default "UTC"
+        """
+        self.time = time
+        self.columns = columns
+        self.tz = tz
+
+    @classmethod
+    def from_frame(cls, candles: pd.DataFrame) -> "Bars":
+        index = pd.DatetimeIndex(candles.index)
+        if index.tz is None:
+            tz = "UTC"
+            index = index.tz_localize("UTC")
+        else:
+            tz = str(index.tz)
+            index = index.tz_convert("UTC")
+        columns = {c: candles[c].to_numpy(dtype=np.float64) for c in COLUMNS if c in candles}
+        return cls(index.as_unit("ns").asi8, columns, tz)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def get_times(self, start: int = 0, end: int = None) -> pd.DatetimeIndex:
+        times = pd.to_datetime(np.asarray(self.time[start:end]), unit="ns", utc=True)
+        return times.tz_convert(self.tz)
+
+
+class BarStore:
+    def __init__(self, root: str) -> None:
+        """
+        On-disk bar history stored as one raw binary file per column, read back as
+        memory-mapped arrays. Appending only writes the new bars, so a multi-year
+        1-minute history can grow a few days at a time (yfinance limits how far back
+        intraday bars go) and be scanned without loading it into RAM.
+
+        Layout: root/TICKER/interval/{time,Open,High,Low,Close,Volume}.bin + meta.json
+
+        Parameters
+        ----------
+        root : str
+            Store directory.
+        """
+        self.root = root
+
+    def get_directory(self, ticker: str, interval: str) -> str:
+        return os.path.join(self.root, ticker.upper(), interval.lower())
+
+    def read_meta(self, directory: str) -> dict:
+        path = os.path.join(directory, "meta.json")
+        if not os.path.exists(path):
+            return {"length": 0, "tz": "UTC"}
+        with open(path) as f:
+            return json.load(f)
+
+    def write_meta(self, directory: str, meta: dict):
+        path = os.path.join(directory, "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    def append(self, ticker: str, interval: str, candles: pd.DataFrame) -> int:
+        """
+        Append the bars newer than the last stored one.
+
+        Returns
+        -------
+        int
+            Number of bars written.
+        """
+        directory = self.get_directory(ticker, interval)
+        os.makedirs(directory, exist_ok=True)
+        meta = self.read_meta(directory)
+        length = meta["length"]
+        bars = Bars.from_frame(candles)
+        start = 0
+        if length:
+            last = self.load(ticker, interval).time[-1]
+            start = int(np.searchsorted(bars.time, last, side="right"))
+        if start >= len(bars):
+            return 0
+        arrays = {"time": bars.time}
+        arrays.update({c: bars[c] for c in COLUMNS})
+        for name, values in arrays.items():
+            path = os.path.join(directory, f"{name}.bin")
+            with open(path, "ab") as f:
+                # Drop any tail left by an interrupted append. 'meta.json' is authoritative.
+                f.truncate(length * 8)
+                f.write(np.ascontiguousarray(values[start:]).tobytes())
+        meta = {"length": length + len(bars) - start, "tz": bars.tz}
+        self.write_meta(directory, meta)
+        return len(bars) - start
+
+    def load(self, ticker: str, interval: str) -> Bars:
+        """
+        Memory-map a stored history.
+        """
+        directory = self.get_directory(ticker, interval)
+        meta = self.read_meta(directory)
+        length = meta["length"]
+
+        def open_array(name: str, dtype):
+            if length == 0:
+                return np.empty(0, dtype=dtype)
+            path = os.path.join(directory, f"{name}.bin")
+            return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+
+        columns = {c: open_array(c, np.float64) for c in COLUMNS}
+        return Bars(open_array("time", np.int64), columns, meta["tz"])
+
+
+# ---------- Streaming Reductions ---------- #
+def get_session_ids(bars: Bars, start: int, end: int) -> np.ndarray:
+    # Local calendar day of each bar in the exchange time zone.
+    times = bars.get_times(start, end).tz_localize(None).as_unit("ns")
+    return times.asi8 // NANOSECONDS_PER_DAY
+
+
+def get_sessions(bars: Bars, chunk_size: int = 1_000_000) -> pd.DataFrame:
+    """
+    Open, high, low and close of every trading session, scanning 'chunk_size' bars at
+    a time. A session split across two chunks is merged in a final pass over the
+    (much smaller) per-chunk results.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by session date, with "open", "high", "low", "close" and "bars".
+    """
+    parts = {k: [] for k in ["session", "open", "high", "low", "close", "bars"]}
+    for start in range(0, len(bars), chunk_size):
+        end = min(start + chunk_size, len(bars))
+        session = get_session_ids(bars, start, end)
+        first = np.flatnonzero(np.concatenate(([True], session[1:] != session[:-1])))
+        last = np.concatenate((first[1:], [len(session)])) - 1
+        parts["session"].append(session[first])
+        parts["open"].append(np.asarray(bars["Open"][start:end])[first])
+        parts["high"].append(np.fmax.reduceat(np.asarray(bars["High"][start:end]), first))
+        parts["low"].append(np.fmin.reduceat(np.asarray(bars["Low"][start:end]), first))
+        parts["close"].append(np.asarray(bars["Close"][start:end])[last])
+        parts["bars"].append(last - first + 1)
+    if not parts["session"]:
+        return pd.DataFrame(columns=["open", "high", "low", "close", "bars"])
+    parts = {k: np.concatenate(v) for k, v in parts.items()}
+    session = parts["session"]
+    first = np.flatnonzero(np.concatenate(([True], session[1:] != session[:-1])))
+    last = np.concatenate((first[1:], [len(session)])) - 1
+    index = pd.to_datetime(session[first] * NANOSECONDS_PER_DAY, unit="ns").date
+    return pd.DataFrame(
+        {
+            "open": parts["open"][first],
+            "high": np.fmax.reduceat(parts["high"], first),
+            "low": np.fmin.reduceat(parts["low"], first),
+            "close": parts["close"][last],
+            "bars": np.add.reduceat(parts["bars"], first),
+        },
+        index=pd.Index(index, name="session"),
+    )
+
+
+def get_session_windows(sessions: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Back-to-back windows of 'window' sessions, from the first session's open to the
+    last session's close. A window of 0 or less (an expired contract) has no windows,
+    as on the daily path.
+
+    Columns match 'OptionsBacktest.set_window', plus the lowest and highest prices
+    reached, as a percent change from the window's open ("low_change", "high_change").
+    A trailing partial window is dropped.
+    """
+    k = max(window, 1)
+    n = len(sessions) // k * k if window > 0 else 0
+    dates = np.asarray(sessions.index[:n], dtype=object).reshape(-1, k)
+    open_ = sessions["open"].to_numpy(dtype=float)[:n].reshape(-1, k)
+    close = sessions["close"].to_numpy(dtype=float)[:n].reshape(-1, k)
+    low = sessions["low"].to_numpy(dtype=float)[:n].reshape(-1, k)
+    high = sessions["high"].to_numpy(dtype=float)[:n].reshape(-1, k)
+    anchor = open_[:, 0]
+    # Session changes: open to close for the first, close to close after that.
+    previous = np.concatenate([anchor[:, None], close[:, :-1]], axis=1)
+    changes = (close - previous) / np.abs(previous) * 100
+    return pd.DataFrame(
+        {
+            "window_start": [str(d) for d in dates[:, 0]],
+            "window_end": [str(d) for d in dates[:, -1]],
+            "window": k,
+            "close_start": anchor,
+            "close_end": close[:, -1],
+            "total_change": (close[:, -1] - anchor) / np.abs(anchor) * 100,
+            "average_change": changes.mean(axis=1),
+            "low_change": (np.nanmin(low, axis=1) - anchor) / np.abs(anchor) * 100,
+            "high_change": (np.nanmax(high, axis=1) - anchor) / np.abs(anchor) * 100,
+        }
+    )
+
+
+def get_minute_windows(
+    bars: Bars, minutes: int, bar_minutes: int, chunk_size: int = 1_000_000
+) -> pd.DataFrame:
+    """
+    Back-to-back windows of 'minutes' trading minutes ('minutes' // 'bar_minutes'
+    bars), scanned 'chunk_size' bars at a time. Chunks hold whole windows, so no
+    window straddles two chunks. Windows may span the overnight gap. A window of 0
+    minutes or less has no windows.
+
+    Columns match 'get_session_windows'.
+    """
+    k = max(minutes // bar_minutes, 1)
+    n = len(bars) // k * k if minutes > 0 else 0
+    step = max(chunk_size // k, 1) * k
+    parts = []
+    for start in range(0, n, step):
+        end = min(start + step, n)
+        open_ = np.asarray(bars["Open"][start:end]).reshape(-1, k)
+        close = np.asarray(bars["Close"][start:end]).reshape(-1, k)
+        low = np.fmin.reduce(np.asarray(bars["Low"][start:end]).reshape(-1, k), axis=1)
+        high = np.fmax.reduce(np.asarray(bars["High"][start:end]).reshape(-1, k), axis=1)
+        times = bars.get_times(start, end)
+        anchor = open_[:, 0]
+        previous = np.concatenate([anchor[:, None], close[:, :-1]], axis=1)
+        changes = (close - previous) / np.abs(previous) * 100
+        parts.append(
+            pd.DataFrame(
+                {
+                    "window_start": times[::k].strftime("%Y-%m-%d %H:%M"),
+                    "window_end": times[k - 1 :: k].strftime("%Y-%m-%d %H:%M"),
+                    "window": minutes,
+                    "close_start": anchor,
+                    "close_end": close[:, -1],
+                    "total_change": (close[:, -1] - anchor) / np.abs(anchor) * 100,
+                    "average_change": changes.mean(axis=1),
+                    "low_change": (low - anchor) / np.abs(anchor) * 100,
+                    "high_change": (high - anchor) / np.abs(anchor) * 100,
+                }
+            )
+        )
+    if not parts:
+        return get_session_windows(pd.DataFrame(columns=["open", "high", "low", "close"]), 1)
+    return pd.concat(parts, ignore_index=True)
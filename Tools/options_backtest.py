@@ -3,7 +3,19 @@ import datetime as dt
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+# Custom
+from Tools.data_source import YahooDataSource
+from Tools.intraday import (
+    Bars,
+    get_interval_minutes,
+    get_minute_windows,
+    get_session_windows,
+    get_sessions,
+    is_intraday,
+)
+from Tools.realized_volatility import RealizedVolatility
+from Tools.result_cache import data_version
 
 
 class OptionsBacktest:
@@ -17,6 +29,11 @@ class OptionsBacktest:
         sell: bool = False,
         interval: str = "1d",
         period: str = "max",
+        data_source=None,
+        cache=None,
+        bar_store=None,
+        chunk_size: int = 1_000_000,
+        realized_volatility=None,
     ) -> None:
         self.ticker = ticker.upper()
         self.strike_price = strike_price
@@ -24,12 +41,42 @@ class OptionsBacktest:
         self.put = put
         self.buy = buy
         self.sell = sell
-        self.candles = yf.download(
-            self.ticker, interval=interval, period=period, multi_level_index=False
+        if data_source is None:
+            data_source = YahooDataSource()
+        self.data_source = data_source
+        self.candles = self.data_source.download(
+            self.ticker, interval=interval, period=period
         )
         self.candles["change"] = self.candles["Close"].pct_change() * 100
         self.last_price = self.candles["Close"].iloc[-1]
+        # Intraday windows are built from bar arrays, memory-mapped from 'bar_store'
+        # (a 'BarStore') when given, so the history can outgrow what one download returns.
+        self.interval = interval
+        self.intraday = is_intraday(interval)
+        self.chunk_size = chunk_size
+        self.bars = None
+        self.sessions = None
+        if self.intraday:
+            if bar_store is not None:
+                bar_store.append(self.ticker, interval, self.candles)
+                self.bars = bar_store.load(self.ticker, interval)
+            else:
+                self.bars = Bars.from_frame(self.candles)
         self.windows = pd.DataFrame()
+        self.window_cache = {}
+        # A shared 'RealizedVolatility' (e.g. from a 'RealizedVolatilityUniverse') only
+        # processes bars it has not seen. It must be built for this interval's bars.
+        if realized_volatility is None:
+            trading_days = 252
+            if self.intraday:
+                # Annualize per bar: 252 sessions times the typical bars per session.
+                trading_days *= int(self.get_sessions()["bars"].median())
+            realized_volatility = RealizedVolatility(trading_days=trading_days)
+        self.realized_volatility = realized_volatility
+        # Optional 'ResultCache'. Results are scoped to this ticker, interval and period.
+        self.cache = cache
+        self.cache_scope = f"OptionsBacktest:{self.ticker}:{interval}:{period.lower()}"
+        self.data_version = data_version(self.candles) if cache is not None else ""
         # Formats
         self.date_format = "%Y-%m-%d"
         self.percent_format = "{:,.0f}%"
@@ -37,6 +84,11 @@ class OptionsBacktest:
         self.dollar_format = "${:,.2f}"
 
     def set_window(self, window: int):
+        if self.intraday:
+            # Windows are counted in trading sessions, not bars.
+            self.windows = get_session_windows(self.get_sessions(), window)
+            self.window_cache[window] = self.windows
+            return
         i = 0
         data = {
             "window_start": [],
@@ -82,11 +134,50 @@ class OptionsBacktest:
             except ZeroDivisionError:
                 break
         self.windows = pd.DataFrame(data)
+        self.window_cache[window] = self.windows
 
-    def get_windows(self, window: int):
-        if self.windows.empty:
+    def get_windows(self, window: int, unit: str = "sessions"):
+        """
+        Back-to-back windows of 'window' sessions (trading days), or of 'window'
+        trading minutes when 'unit' is "minutes" (intraday intervals only).
+        """
+        if unit == "minutes":
+            if not self.intraday:
+                raise ValueError("Minute windows require an intraday interval.")
+            key = ("minutes", window)
+            if key not in self.window_cache:
+                self.window_cache[key] = get_minute_windows(
+                    self.bars, window, get_interval_minutes(self.interval), self.chunk_size
+                )
+            return self.window_cache[key]
+        elif unit != "sessions":
+            raise ValueError("Invalid unit. Use 'sessions' or 'minutes'.")
+        if window not in self.window_cache:
             self.set_window(window)
-        return self.windows
+        return self.window_cache[window]
+
+    def get_sessions(self) -> pd.DataFrame:
+        """
+        Per-session OHLC of the intraday bars, computed once with a chunked scan.
+        """
+        if self.sessions is None:
+            self.sessions = get_sessions(self.bars, self.chunk_size)
+        return self.sessions
+
+    def get_realized_volatility(self) -> pd.DataFrame:
+        """
+        Rolling realized volatility of 'self.candles'. Only bars added since the last
+        call are processed.
+        """
+        self.realized_volatility.update(self.candles)
+        return self.realized_volatility.history
+
+    def get_latest_realized_volatility(self) -> pd.Series:
+        """
+        Latest estimates only, without joining the history.
+        """
+        self.realized_volatility.update(self.candles)
+        return self.realized_volatility.latest()
 
     def get_probability(
         self,
@@ -95,27 +186,59 @@ class OptionsBacktest:
         option_type: str = "call",
         return_value: bool = True,
         return_dict: bool = False,
+        minutes: int = 0,
+        as_of=None,
+        manual_stock_price: float = 0,
     ):
+        """
+        Percent of past windows as long as the time to 'expiration_date' that moved
+        past 'strike_price'. NaN if the history has no complete window.
 
+        'as_of' is the date the time to expiration is measured from, by default today,
+        and 'manual_stock_price' the spot the strike distance is measured from, by
+        default the last close. Pass the chain's date and spot when scoring archived
+        snapshots.
+        """
+        if manual_stock_price == 0:
+            last_price = self.last_price
+        else:
+            last_price = manual_stock_price
         if option_type == "call":
-            strike_spread = (
-                (strike_price - self.last_price) / abs(self.last_price)
-            ) * 100
+            strike_spread = ((strike_price - last_price) / abs(last_price)) * 100
         elif option_type == "put":
-            strike_spread = (
-                (self.last_price - strike_price) / abs(self.last_price)
-            ) * -100
+            strike_spread = ((last_price - strike_price) / abs(last_price)) * -100
 
-        now = dt.datetime.now().date()
-        window = self.get_time_delta(now, expiration_date, weekend_adjusted=True)
-        df = self.get_windows(window)
-        if option_type == "call":
-            matches = df[df["total_change"] > strike_spread]
-        elif option_type == "put":
-            matches = df[df["total_change"] < strike_spread]
-        df_len = len(df)
-        match_len = len(matches)
-        probability = (match_len / df_len) * 100
+        if minutes:
+            # Intraday: a window of 'minutes' trading minutes instead of sessions.
+            window = minutes
+            unit = "minutes"
+        else:
+            as_of = as_of or dt.datetime.now().date()
+            window = self.get_time_delta(as_of, expiration_date, weekend_adjusted=True)
+            unit = "sessions"
+        if self.cache is None:
+            match_len, df_len = self.count_matches(
+                window, strike_spread, option_type, unit
+            )
+        else:
+            params = {
+                "last_bar": str(self.candles.index[-1]),
+                "window": window,
+                "unit": unit,
+                "strike_spread": round(strike_spread, 10),
+                "option_type": option_type,
+            }
+            match_len, df_len = self.cache.get_or_compute(
+                self.cache_scope,
+                self.data_version,
+                params,
+                lambda: self.count_matches(window, strike_spread, option_type, unit),
+            )
+        if df_len == 0:
+            # Expired contract or a history shorter than the window.
+            probability = np.nan
+        else:
+            probability = (match_len / df_len) * 100
         if self.sell and not self.buy:
             probability = 100 - probability
 
@@ -132,26 +255,39 @@ class OptionsBacktest:
 
             return f"""
 ========================================================
-Last Price: {self.dollar_format.format(self.last_price)}
+Last Price: {self.dollar_format.format(last_price)}
 Strike: {self.dollar_format.format(strike_price)}
 Distance: {self.percent_decimal_format.format(strike_spread)}
 
 ----------
 [Window]
 Length(DTE): {window}
-Matches: {len(matches)}
-Total: {int(len(self.candles) / window)}
+Matches: {match_len}
+Total: {df_len}
 Probability: {self.percent_decimal_format.format(probability)}
 
 ----------
 Trading Days Analyzed: {len(self.candles)}
 
 Over the last \033[4m{len(self.candles)}\033[0m trading days,
-\033[4m${self.ticker}\033[0m has dropped \033[4m{self.percent_decimal_format.format(strike_spread)}\033[0m over \033[4m{window}\033[0m days a total of \033[4m{len(matches)}\033[0m time(s). 
+\033[4m${self.ticker}\033[0m has dropped \033[4m{self.percent_decimal_format.format(strike_spread)}\033[0m over \033[4m{window}\033[0m days a total of \033[4m{match_len}\033[0m time(s). 
             
                 
     """
 
+    def count_matches(
+        self, window: int, strike_spread: float, option_type: str, unit: str = "sessions"
+    ):
+        """
+        Number of windows that moved past 'strike_spread', and the number of windows.
+        """
+        df = self.get_windows(window, unit)
+        if option_type == "call":
+            matches = df[df["total_change"] > strike_spread]
+        elif option_type == "put":
+            matches = df[df["total_change"] < strike_spread]
+        return len(matches), len(df)
+
     def get_time_delta(self, t1, t2, weekend_adjusted: bool = True):
         """
         Get the time delta between a two dates.
@@ -1,18 +1,17 @@
 # Data
 import re
-import math
 import numpy as np
 import pandas as pd
-from scipy.stats import norm
 
 # Date & Time
 import datetime as dt
 
-# Yahoo
-import yfinance as yf
-
 # Custom
+from Tools.binomial import calculate_american
+from Tools.black_scholes import norm_cdf, norm_pdf
+from Tools.data_source import YahooDataSource
 from Tools.options_backtest import OptionsBacktest
+from Tools.volatility_surface import get_volatility_surface
 
 
 class OptionsChain:
@@ -26,6 +25,13 @@ class OptionsChain:
         sell=False,
         contract_fee: float = 0.04,
         backtest_period: str = "max",
+        data_source=None,
+        use_surface: bool = False,
+        pricing: str = "european",
+        dividend_yield: float = 0.0,
+        cache=None,
+        archive=None,
+        realized_volatility=None,
     ) -> None:
         self.ticker = ticker.upper()
         if call:
@@ -42,6 +48,12 @@ class OptionsChain:
         self.sell = sell
         self.contract_fee = contract_fee
         self.backtest_period = backtest_period
+        if data_source is None:
+            data_source = YahooDataSource()
+        self.data_source = data_source
+        self.cache = cache
+        # Optional 'ChainArchive'. Every raw chain fetched by 'set_chain' is appended.
+        self.archive = archive
         self.backtest = OptionsBacktest(
             ticker,
             strike_price=0,
@@ -50,13 +62,21 @@ class OptionsChain:
             buy=buy,
             sell=sell,
             period=backtest_period,
+            data_source=data_source,
+            cache=cache,
+            realized_volatility=realized_volatility,
         )
+        self.period_backtests = {backtest_period.lower(): self.backtest}
         self.option_chain = pd.DataFrame()
         self.calls = pd.DataFrame()
         self.puts = pd.DataFrame()
         self.candles = self.backtest.candles
         self.stock_price = self.backtest.last_price
         self.risk_free_rate = None
+        self.use_surface = use_surface
+        self.pricing = pricing
+        self.dividend_yield = dividend_yield
+        self.volatility_surface = None
 
         # Dates
         self.current_date = dt.datetime.now().date()
@@ -74,11 +94,11 @@ class OptionsChain:
 
     # ---------- Options Chain ---------- #
     def set_chain(self):
-        stock = yf.Ticker(self.ticker)
-        if self.expiration_date == "":
-            self.option_chain = stock.option_chain()
-        else:
-            self.option_chain = stock.option_chain(self.expiration_date)
+        self.option_chain = self.data_source.option_chain(
+            self.ticker, self.expiration_date
+        )
+        if self.archive is not None:
+            self.archive.append(self.ticker, self.option_chain, self.get_stock_price())
 
     def get_chain(self):
         if len(self.option_chain) == 0:
@@ -87,7 +107,7 @@ class OptionsChain:
 
     # ---------- Candles ---------- #
     def set_candles(self):
-        self.candles = yf.download(self.ticker, multi_level_index=False)
+        self.candles = self.data_source.download(self.ticker)
 
     def get_candles(self):
         if self.candles.empty:
@@ -106,7 +126,7 @@ class OptionsChain:
 
     # ---------- Risk Free Rate ---------- #
     def set_risk_free_rate(self, ticker: str = "^TNX"):
-        self.risk_free_rate = yf.download(ticker, multi_level_index=False)
+        self.risk_free_rate = self.data_source.download(ticker)
         self.risk_free_rate = self.risk_free_rate["Close"].iloc[-1]
 
     def get_risk_free_rate(self, ticker: str = "^TNX", return_decimal: bool = True):
@@ -117,12 +137,31 @@ class OptionsChain:
         else:
             return self.risk_free_rate
 
+    # ---------- Volatility Surface ---------- #
+    def set_volatility_surface(self, snapshot: str = ""):
+        # Times to expiration are measured from the chain's date, not the wall clock.
+        snapshot = snapshot or self.current_date.strftime(self.date_format)
+        self.volatility_surface = get_volatility_surface(
+            self.ticker,
+            self.get_stock_price(),
+            self.data_source,
+            risk_free_rate=self.get_risk_free_rate(),
+            snapshot=snapshot,
+        )
+
+    def get_volatility_surface(self):
+        if self.volatility_surface is None:
+            self.set_volatility_surface()
+        return self.volatility_surface
+
     # ---------- Calls ---------- #
     def set_calls(self) -> pd.DataFrame:
         if len(self.option_chain) == 0:
             self.set_chain()
         self.calls = self.option_chain.calls
-        self.calls = self.apply_peripherals(self.calls, "call")
+        self.calls = self.apply_peripherals(
+            self.calls, "call", self.use_surface, self.pricing
+        )
 
     def get_calls(self) -> pd.DataFrame:
         if self.calls.empty:
@@ -134,7 +173,9 @@ class OptionsChain:
         if len(self.option_chain) == 0:
             self.set_chain()
         self.puts = self.option_chain.puts
-        self.puts = self.apply_peripherals(self.puts, "put")
+        self.puts = self.apply_peripherals(
+            self.puts, "put", self.use_surface, self.pricing
+        )
 
     def get_puts(self):
         if self.puts.empty:
@@ -142,20 +183,40 @@ class OptionsChain:
         return self.puts
 
     # ---------- Option Peripheral ---------- #
-    def apply_peripherals(self, option_data: pd.DataFrame, option_type: str):
+    def apply_peripherals(
+        self,
+        option_data: pd.DataFrame,
+        option_type: str,
+        use_surface: bool = False,
+        pricing: str = "european",
+    ):
+        """
+        Add strike spread, expiration, selling, Greek and probability columns.
+
+        Parameters
+        ----------
+        option_data : pd.DataFrame
+            Raw calls or puts from the option chain.
+        option_type : str
+            "call" or "put"
+        use_surface : bool, optional
+            Feed the Greeks from the fitted volatility surface instead of each contract's
+            own 'impliedVolatility'. Adds an 'IV_surface' column, by default False
+        pricing : str, optional
+            "european" for Black-Scholes Greeks, "american" for binomial Greeks that
+            account for early exercise (uses 'self.dividend_yield'), by default "european"
+        """
         # Stock Price & Risk Free Rate
         stock_price = self.get_stock_price()
         risk_free_rate = self.get_risk_free_rate()
         # Strike Spread
         if option_type == "call":
             option_data["strike_spread"] = (
-                (option_data["strike"] - self.backtest.last_price)
-                / self.backtest.last_price
+                (option_data["strike"] - stock_price) / stock_price
             ) * 100
         elif option_type == "put":
             option_data["strike_spread"] = (
-                (self.backtest.last_price - option_data["strike"])
-                / self.backtest.last_price
+                (stock_price - option_data["strike"]) / stock_price
             ) * -100
         # Expiration Dates
         option_data["expirationDate"] = option_data["contractSymbol"].apply(
@@ -175,23 +236,35 @@ class OptionsChain:
         option_data["annual_yield"] = option_data["sell_yield"] * periods
         # Volume data
         option_data["volume/OI"] = option_data["volume"] / option_data["openInterest"]
-        # Greeks
-        option_data["delta"] = option_data.apply(
-            lambda row: self.calculate_row_delta(row, stock_price, risk_free_rate),
-            axis=1,
-        )
-        option_data["gamma"] = option_data.apply(
-            lambda row: self.calculate_gamma_row(row, stock_price, risk_free_rate),
-            axis=1,
-        )
-        option_data["theta"] = option_data.apply(
-            lambda row: self.calculate_theta_row(row, stock_price, risk_free_rate),
-            axis=1,
-        )
-        option_data["vega"] = option_data.apply(
-            lambda row: self.calculate_vega_row(row, stock_price, risk_free_rate),
-            axis=1,
-        )
+        # Greeks (whole columns at once)
+        K = option_data["strike"].to_numpy(dtype=float)
+        T = option_data["DTE"].to_numpy(dtype=float) / 365
+        if use_surface:
+            sigma = self.get_volatility_surface().implied_volatility(K, T)
+        else:
+            sigma = option_data["impliedVolatility"].to_numpy(dtype=float)
+        if pricing == "european":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                option_data["delta"] = self.calculate_delta(
+                    stock_price, K, T, risk_free_rate, sigma, option_type
+                )
+                option_data["gamma"] = self.calculate_gamma(
+                    stock_price, K, T, risk_free_rate, sigma
+                )
+                option_data["theta"] = self.calculate_theta(
+                    stock_price, K, T, risk_free_rate, sigma, option_type
+                )
+                option_data["vega"] = self.calculate_vega(
+                    stock_price, K, T, risk_free_rate, sigma
+                )
+        elif pricing == "american":
+            greeks = calculate_american(
+                stock_price, K, T, risk_free_rate, sigma, option_type, self.dividend_yield
+            )
+            for g in ["delta", "gamma", "theta", "vega"]:
+                option_data[g] = greeks[g]
+        else:
+            raise ValueError("Invalid pricing. Use 'european' or 'american'.")
 
         columns = [
             "contractSymbol",
@@ -225,6 +298,19 @@ class OptionsChain:
             "vega",
         ]
         option_data = option_data[columns]
+        # Implied vs realized volatility (latest 20 day estimates)
+        realized = self.backtest.get_latest_realized_volatility()
+        iv_index = columns.index("impliedVolatility") + 1
+        if use_surface:
+            option_data.insert(iv_index, "IV_surface", sigma)
+            iv_index += 1
+        option_data.insert(iv_index, "HV", realized["close"])
+        option_data.insert(
+            iv_index + 1, "IV/HV", option_data["impliedVolatility"] / realized["close"]
+        )
+        option_data.insert(
+            iv_index + 2, "IV/HV_ewma", option_data["impliedVolatility"] / realized["ewma"]
+        )
         option_data.rename(
             columns={
                 "percentChange": "change%",
@@ -235,7 +321,18 @@ class OptionsChain:
             inplace=True,
         )
         option_data.drop(["contractSize", "currency"], axis=1, inplace=True)
-        format_cols = ["mark", "change", "change%", "volume/OI", "IV"]
+        format_cols = [
+            "mark",
+            "change",
+            "change%",
+            "volume/OI",
+            "IV",
+            "HV",
+            "IV/HV",
+            "IV/HV_ewma",
+        ]
+        if use_surface:
+            format_cols.append("IV_surface")
 
         for c in format_cols:
             option_data[c] = option_data[c].apply(self.decimal_format.format)
@@ -246,16 +343,6 @@ class OptionsChain:
         return option_data
 
     # ---------- Delta ---------- #
-    def calculate_row_delta(self, row, S, r):
-        return self.calculate_delta(
-            S=S,
-            K=row["strike"],
-            T=row["DTE"] / 365,
-            r=r,
-            sigma=row["impliedVolatility"],
-            option_type="call" if "C" in row["contractSymbol"] else "put",
-        )
-
     def calculate_delta(self, S, K, T, r, sigma, option_type="call"):
         """
         Calculate Delta using the Black-Scholes formula.
@@ -274,22 +361,13 @@ class OptionsChain:
         # print(f"S: {S} K: {K} T: {T} r: {r}  sigma: {sigma} Type: {option_type}")
         d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
         if option_type == "call":
-            return norm.cdf(d1)  # Call Delta
+            return norm_cdf(d1)  # Call Delta
         elif option_type == "put":
-            return norm.cdf(d1) - 1  # Put Delta
+            return norm_cdf(d1) - 1  # Put Delta
         else:
             raise ValueError("Invalid option_type. Use 'call' or 'put'.")
 
     # ---------- Gamma ---------- #
-    def calculate_gamma_row(self, row, S, r):
-        return self.calculate_gamma(
-            S=S,
-            K=row["strike"],
-            T=row["DTE"] / 365,
-            r=r,
-            sigma=row["impliedVolatility"],
-        )
-
     def calculate_gamma(self, S, K, T, r, sigma):
         """
         Calculate the gamma of an option.
@@ -305,26 +383,16 @@ class OptionsChain:
         Gamma value
         """
         # Calculate d1
-        d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
+        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
 
         # Standard normal PDF for d1
-        phi_d1 = norm.pdf(d1)  # scipy.stats.norm.pdf(d1) computes φ(d1)
+        phi_d1 = norm_pdf(d1)
 
         # Gamma formula
-        gamma = phi_d1 / (S * sigma * math.sqrt(T))
+        gamma = phi_d1 / (S * sigma * np.sqrt(T))
         return gamma
 
     # ---------- Theta ---------- #
-    def calculate_theta_row(self, row, S, r):
-        return self.calculate_theta(
-            S=S,
-            K=row["strike"],
-            T=row["DTE"] / 365,
-            r=r,
-            sigma=row["impliedVolatility"],
-            option_type="call" if "C" in row["contractSymbol"] else "put",
-        )
-
     def calculate_theta(self, S, K, T, r, sigma, option_type="call"):
         """
         Calculate the theta of an option using the Black-Scholes model.
@@ -345,28 +413,19 @@ class OptionsChain:
         d2 = d1 - sigma * np.sqrt(T)
 
         if option_type == "call":
-            theta = (-S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T)) - r * K * np.exp(
+            theta = (-S * norm_pdf(d1) * sigma) / (2 * np.sqrt(T)) - r * K * np.exp(
                 -r * T
-            ) * norm.cdf(d2)
+            ) * norm_cdf(d2)
         elif option_type == "put":
-            theta = (-S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T)) + r * K * np.exp(
+            theta = (-S * norm_pdf(d1) * sigma) / (2 * np.sqrt(T)) + r * K * np.exp(
                 -r * T
-            ) * norm.cdf(-d2)
+            ) * norm_cdf(-d2)
         else:
             raise ValueError("Invalid option type. Must be 'call' or 'put'")
 
         return theta / 365
 
     # ---------- Vega ---------- #
-    def calculate_vega_row(self, row, S, r):
-        return self.calculate_vega(
-            S=S,
-            K=row["strike"],
-            T=row["DTE"] / 365,
-            r=r,
-            sigma=row["impliedVolatility"],
-        )
-
     def calculate_vega(self, S, K, T, r, sigma):
         """
         Calculate the vega of an option using the Black-Scholes model.
@@ -382,13 +441,13 @@ class OptionsChain:
         float - Vega value
         """
         # Calculate d1
-        d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
+        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
 
         # Standard normal PDF
-        phi_d1 = norm.pdf(d1)
+        phi_d1 = norm_pdf(d1)
 
         # Vega formula
-        vega = S * phi_d1 * math.sqrt(T)
+        vega = S * phi_d1 * np.sqrt(T)
 
         return vega
 
@@ -409,9 +468,8 @@ class OptionsChain:
             return np.nan
 
     def apply_dte(self, expiration_date: str):
-        current_date = dt.date.today()
         expiration_date = dt.datetime.strptime(expiration_date, self.date_format).date()
-        delta = expiration_date - current_date
+        delta = expiration_date - self.current_date
         return delta.days
 
     # ---------- Trading Days Expiration ---------- #
@@ -427,46 +485,92 @@ class OptionsChain:
             row["strike"],
             expiration_date=row["expirationDate"],
             option_type=option_type,
+            as_of=self.current_date,
+            manual_stock_price=self.get_stock_price(),
         )
         return probability
 
     # ---------- Display ---------- #
-    def display(
+    def get_period_backtest(self, period: str) -> OptionsBacktest:
+        period = period.lower()
+        if period not in self.period_backtests:
+            self.period_backtests[period] = OptionsBacktest(
+                self.ticker,
+                0,
+                self.call,
+                self.put,
+                self.buy,
+                self.sell,
+                period=period,
+                data_source=self.data_source,
+                cache=self.cache,
+            )
+        return self.period_backtests[period]
+
+    def get_report(
         self,
         row,
         option_type: str,
         num_contracts: int = 1,
         backtest_periods: list = ["1Y", "5Y", "10Y", "max"],
-    ):
+    ) -> dict:
+        """
+        Collect the values printed by 'display' for a single contract.
+
+        Backtests for each period are kept in 'self.period_backtests', so repeated
+        reports on the same chain do not download candles again.
+
+        Returns
+        -------
+        dict
+            Price, strike, expiration, probability per period, profitability and year range.
+        """
         # Year range
-        one_year = yf.download(self.ticker, period="1y")
-        year_low = one_year["Low"].min().values[0]
-        year_high = one_year["High"].max().values[0]
+        one_year = self.get_period_backtest("1y").candles
+        year_low = one_year["Low"].min()
+        year_high = one_year["High"].max()
         # Spread & Fees
         fees = num_contracts * self.contract_fee
         strike = row["strike"]
-        spread = row["strike_spread"]
         # Expiration
         expiration = row["expirationDate"]
-        dte = row["DTE"]
-        tdte = row["TDTE"]
-        # Credit & Premium
-        credit = row["sell_credit"] - fees
-        collateral = row["sell_collateral"]
-        d_labels = []
+        probabilities = {}
         for i in backtest_periods:
-
-            backtest = OptionsBacktest(
-                self.ticker, strike, self.call, self.put, self.buy, self.sell, period=i
-            )
-            candles = backtest.candles
-            bt = backtest.get_probability(
+            backtest = self.get_period_backtest(i)
+            probabilities[i] = backtest.get_probability(
                 strike,
                 option_type=option_type,
                 expiration_date=expiration,
                 return_value=False,
                 return_dict=True,
+                as_of=self.current_date,
+                manual_stock_price=self.get_stock_price(),
             )
+        return {
+            "price": self.stock_price,
+            "strike": strike,
+            "distance": row["strike_spread"],
+            "expiration": expiration,
+            "DTE": row["DTE"],
+            "TDTE": row["TDTE"],
+            "probabilities": probabilities,
+            # Credit & Premium
+            "premium": row["sell_credit"] - fees,
+            "collateral": row["sell_collateral"],
+            "year_low": year_low,
+            "year_high": year_high,
+        }
+
+    def display(
+        self,
+        row,
+        option_type: str,
+        num_contracts: int = 1,
+        backtest_periods: list = ["1Y", "5Y", "10Y", "max"],
+    ):
+        report = self.get_report(row, option_type, num_contracts, backtest_periods)
+        d_labels = []
+        for i, bt in report["probabilities"].items():
             if i.lower() == "max":
                 label = i
             else:
@@ -474,29 +578,19 @@ class OptionsChain:
 
             d = f"""{label} Year(s): {self.percent_decimal_format.format(bt['probability'])}
 """
-
-            #             d = f"""
-
-            # -- {label} Year --
-
-            # Total Candles: {len(backtest.candles)}
-            # Total Periods: {bt['total']}
-            # Match Periods: {bt['match']}
-            # Probability: {self.percent_decimal_format.format(bt['probability'])}
-            #             """
             d_labels.append(d)
 
         display = f"""
 ===========================================================
-Price: {self.dollar_format.format(self.stock_price)}
-Strike: {self.dollar_format.format(strike)}
-Distance: {self.percent_decimal_format.format(spread)}
+Price: {self.dollar_format.format(report['price'])}
+Strike: {self.dollar_format.format(report['strike'])}
+Distance: {self.percent_decimal_format.format(report['distance'])}
 
 ----------
 [Expiration]
 
-DTE: {dte}
-TDTE: {tdte}
+DTE: {report['DTE']}
+TDTE: {report['TDTE']}
 
 ----------
 {''.join(d_labels)}
@@ -504,13 +598,13 @@ TDTE: {tdte}
 ----------
 [Profitability]
 
-Premium: {credit}
-Collateral: {collateral}
+Premium: {report['premium']}
+Collateral: {report['collateral']}
 
 ----------
 [Year Range]
 
-{self.dollar_format.format(year_low)} - {self.dollar_format.format(year_high)}
+{self.dollar_format.format(report['year_low'])} - {self.dollar_format.format(report['year_high'])}
 
         
         
@@ -0,0 +1,268 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+# Custom
+from Tools import black_scholes as bs
+
+
+class PositionBook:
+    def __init__(self, risk_free_rate: float = 0.04, multiplier: int = 100) -> None:
+        """
+        Book of option positions with aggregated Greeks and scenario P&L.
+
+        Greeks are stored per position and recomputed only for the rows affected by a
+        quote change. Quantities are signed: negative for short (sold) contracts.
+
+        Parameters
+        ----------
+        risk_free_rate : float, optional
+            Annual rate as a decimal, by default 0.04
+        multiplier : int, optional
+            Shares per contract, by default 100
+        """
+        self.risk_free_rate = risk_free_rate
+        self.multiplier = multiplier
+        self.greeks = ["delta", "gamma", "theta", "vega"]
+        self.columns = [
+            "ticker",
+            "contractSymbol",
+            "option_type",
+            "strike",
+            "expirationDate",
+            "quantity",
+            "spot",
+            "IV",
+            "T",
+            "price",
+        ] + self.greeks
+        self.positions = pd.DataFrame(columns=self.columns)
+        self.date_format = "%Y-%m-%d"
+
+    # ---------- Positions ---------- #
+    def add_position(
+        self,
+        ticker: str,
+        contract_symbol: str,
+        option_type: str,
+        strike: float,
+        expiration_date: str,
+        quantity: int,
+        spot: float,
+        iv: float,
+    ):
+        """
+        Add a position, or change the quantity of an existing one.
+
+        Parameters
+        ----------
+        ticker : str
+            Underlying ticker.
+        contract_symbol : str
+            Contract symbol, used as the position key.
+        option_type : str
+            "call" or "put"
+        strike : float
+            Strike price.
+        expiration_date : str
+            Expiration date "%Y-%m-%d".
+        quantity : int
+            Signed number of contracts (negative for short).
+        spot : float
+            Underlying price.
+        iv : float
+            Implied volatility as a decimal.
+        """
+        if option_type not in ["call", "put"]:
+            raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+        if contract_symbol in self.positions.index:
+            self.positions.loc[contract_symbol, "quantity"] += quantity
+            return
+        row = {
+            "ticker": ticker.upper(),
+            "contractSymbol": contract_symbol,
+            "option_type": option_type,
+            "strike": float(strike),
+            "expirationDate": expiration_date,
+            "quantity": quantity,
+            "spot": float(spot),
+            "IV": float(iv),
+            "T": self.get_time_to_expiration(expiration_date),
+        }
+        row = pd.DataFrame([row], index=[contract_symbol])
+        if self.positions.empty:
+            self.positions = row.reindex(columns=self.columns)
+        else:
+            self.positions = pd.concat([self.positions, row])
+        self.recompute(self.positions.index == contract_symbol)
+
+    def add_positions(self, positions: pd.DataFrame):
+        """
+        Add many new positions at once and price them in one vectorized call.
+
+        Parameters
+        ----------
+        positions : pd.DataFrame
+            Columns: ticker, contractSymbol, option_type, strike, expirationDate,
+            quantity, spot, IV. Symbols must not already be in the book.
+        """
+        df = positions.set_index(positions["contractSymbol"], drop=False).copy()
+        df.index.name = None
+        df["ticker"] = df["ticker"].str.upper()
+        df["T"] = df["expirationDate"].apply(self.get_time_to_expiration)
+        df = df.reindex(columns=self.columns)
+        if self.positions.empty:
+            self.positions = df
+        else:
+            self.positions = pd.concat([self.positions, df])
+        self.recompute(self.positions.index.isin(df.index))
+
+    def add_from_chain(self, chain, contract_symbol: str, quantity: int):
+        """
+        Add a position from a contract listed in an 'OptionsChain'.
+
+        Parameters
+        ----------
+        chain : OptionsChain
+            Chain containing the contract.
+        contract_symbol : str
+            Contract symbol from the chain.
+        quantity : int
+            Signed number of contracts (negative for short).
+        """
+        raw = chain.get_chain()
+        for option_type, df in [("call", raw.calls), ("put", raw.puts)]:
+            match = df[df["contractSymbol"] == contract_symbol]
+            if not match.empty:
+                row = match.iloc[0]
+                self.add_position(
+                    chain.ticker,
+                    contract_symbol,
+                    option_type,
+                    row["strike"],
+                    chain.apply_expiration_date(contract_symbol),
+                    quantity,
+                    chain.get_stock_price(),
+                    row["impliedVolatility"],
+                )
+                return
+        raise KeyError(f"{contract_symbol} not found in {chain.ticker} chain")
+
+    def remove_position(self, contract_symbol: str):
+        self.positions = self.positions.drop(contract_symbol)
+
+    def get_time_to_expiration(self, expiration_date: str) -> float:
+        expiration = dt.datetime.strptime(expiration_date, self.date_format).date()
+        # Floor at one day so expiring contracts keep finite Greeks.
+        return max((expiration - dt.date.today()).days, 1) / 365
+
+    # ---------- Pricing ---------- #
+    def recompute(self, mask=None):
+        """
+        Reprice the rows selected by 'mask' (all rows by default) in one vectorized call.
+        """
+        if mask is None:
+            mask = np.ones(len(self.positions), dtype=bool)
+        df = self.positions.loc[mask]
+        if df.empty:
+            return
+        args = (
+            df["spot"].to_numpy(dtype=float),
+            df["strike"].to_numpy(dtype=float),
+            df["T"].to_numpy(dtype=float),
+            self.risk_free_rate,
+            df["IV"].to_numpy(dtype=float),
+            df["option_type"].to_numpy(),
+        )
+        self.positions.loc[mask, "price"] = bs.calculate_price(*args)
+        greeks = bs.calculate_greeks(*args)
+        for g in self.greeks:
+            self.positions.loc[mask, g] = greeks[g]
+
+    def update_quote(
+        self, ticker: str = "", contract_symbol: str = "", spot=None, iv=None
+    ):
+        """
+        Update the spot of every position on 'ticker' and/or the IV of one contract,
+        then reprice only the affected positions.
+        """
+        mask = np.zeros(len(self.positions), dtype=bool)
+        if ticker and spot is not None:
+            ticker_mask = (self.positions["ticker"] == ticker.upper()).to_numpy()
+            self.positions.loc[ticker_mask, "spot"] = float(spot)
+            mask |= ticker_mask
+        if contract_symbol:
+            contract_mask = self.positions.index == contract_symbol
+            if iv is not None:
+                self.positions.loc[contract_mask, "IV"] = float(iv)
+            if spot is not None and not ticker:
+                self.positions.loc[contract_mask, "spot"] = float(spot)
+            mask |= contract_mask
+        self.recompute(mask)
+
+    # ---------- Aggregation ---------- #
+    def get_position_greeks(self) -> pd.DataFrame:
+        """
+        Greeks scaled by signed quantity and multiplier (delta in shares).
+        """
+        df = self.positions[["ticker"] + self.greeks].copy()
+        size = self.positions["quantity"].to_numpy(dtype=float) * self.multiplier
+        for g in self.greeks:
+            df[g] = df[g].to_numpy(dtype=float) * size
+        return df
+
+    def aggregate(self) -> pd.DataFrame:
+        """
+        Position Greeks summed by ticker, with a "total" row.
+        """
+        df = self.get_position_greeks().groupby("ticker")[self.greeks].sum()
+        df.loc["total"] = df.sum()
+        return df
+
+    # ---------- Scenarios ---------- #
+    def scenario_grid(self, spot_shocks, vol_shocks, by_ticker: bool = False):
+        """
+        P&L of the whole book over a spot-shock x vol-shock grid.
+
+        Every position is repriced at every grid point in a single broadcast
+        Black-Scholes call of shape (positions, spot shocks, vol shocks).
+
+        Parameters
+        ----------
+        spot_shocks : list | np.ndarray
+            Relative spot moves, e.g. [-0.1, 0, 0.1].
+        vol_shocks : list | np.ndarray
+            Absolute volatility moves, e.g. [-0.05, 0, 0.05].
+        by_ticker : bool, optional
+            Return one grid per ticker in a dict, by default False
+
+        Returns
+        -------
+        pd.DataFrame | dict
+            P&L in dollars indexed by spot shock with one column per vol shock.
+        """
+        spot_shocks = np.asarray(spot_shocks, dtype=float)
+        vol_shocks = np.asarray(vol_shocks, dtype=float)
+        df = self.positions
+        S = df["spot"].to_numpy(dtype=float)[:, None, None] * (1 + spot_shocks[None, :, None])
+        sigma = df["IV"].to_numpy(dtype=float)[:, None, None] + vol_shocks[None, None, :]
+        sigma = np.maximum(sigma, 1e-4)
+        K = df["strike"].to_numpy(dtype=float)[:, None, None]
+        T = df["T"].to_numpy(dtype=float)[:, None, None]
+        option_type = df["option_type"].to_numpy()[:, None, None]
+        price = bs.calculate_price(S, K, T, self.risk_free_rate, sigma, option_type)
+        size = df["quantity"].to_numpy(dtype=float)[:, None, None] * self.multiplier
+        pnl = (price - df["price"].to_numpy(dtype=float)[:, None, None]) * size
+
+        def to_frame(values):
+            return pd.DataFrame(
+                values,
+                index=pd.Index(spot_shocks, name="spot_shock"),
+                columns=pd.Index(vol_shocks, name="vol_shock"),
+            )
+
+        if not by_ticker:
+            return to_frame(pnl.sum(axis=0))
+        tickers = df["ticker"].to_numpy()
+        return {t: to_frame(pnl[tickers == t].sum(axis=0)) for t in np.unique(tickers)}
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+
+
+class RealizedVolatility:
+    def __init__(
+        self, window: int = 20, ewma_lambda: float = 0.94, trading_days: int = 252
+    ) -> None:
+        """
+        Rolling realized volatility that is updated incrementally as bars arrive.
+
+        Three annualized estimators are kept:
+        - "close": close-to-close standard deviation of log returns over 'window' bars.
+        - "parkinson": high-low range estimator over 'window' bars.
+        - "ewma": RiskMetrics exponentially weighted volatility.
+
+        Rolling sums are built from cumulative sums over only the new bars plus the last
+        'window' terms of state, so each update is O(new bars + window). The state from
+        before the last bar is kept too, so a last bar that is revised later (e.g. the
+        in-progress daily bar during market hours) is recomputed rather than frozen.
+
+        Parameters
+        ----------
+        window : int, optional
+            Bars per rolling estimate, by default 20
+        ewma_lambda : float, optional
+            Decay of the EWMA estimator, by default 0.94
+        trading_days : int, optional
+            Bars per year for annualization, by default 252
+        """
+        self.window = window
+        self.ewma_lambda = ewma_lambda
+        self.trading_days = trading_days
+        self.last_index = None
+        self.last_close = None
+        self.ewma_variance = None
+        # Last 'window' log returns and squared log ranges, carried between updates.
+        self.returns = np.array([])
+        self.ranges = np.array([])
+        # High, low and close of the last bar, and the state from before it.
+        self.last_bar = None
+        self.rollback = None
+        # Estimates are kept as one frame per update and only joined when 'history'
+        # is read, so an update never copies what came before it.
+        self.columns = ["close", "parkinson", "ewma"]
+        self.chunks = []
+        self.joined = pd.DataFrame(columns=self.columns, dtype=float)
+
+    @property
+    def history(self) -> pd.DataFrame:
+        """
+        Every estimate so far. Joining is O(history), done once per read after an update.
+        """
+        if self.chunks:
+            self.joined = pd.concat([self.joined] + self.chunks)
+            self.chunks = []
+        return self.joined
+
+    def rolling(self, tail: np.ndarray, new: np.ndarray):
+        """
+        Rolling sum and sum of squares over 'window' for the 'new' values only.
+        """
+        values = np.concatenate([tail, new])
+        valid = ~np.isnan(values)
+        s1 = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+        s2 = np.concatenate(([0.0], np.cumsum(np.where(valid, values**2, 0.0))))
+        count = np.concatenate(([0], np.cumsum(valid)))
+        end = np.arange(len(tail) + 1, len(values) + 1)
+        start = np.maximum(end - self.window, 0)
+        n = count[end] - count[start]
+        return s1[end] - s1[start], s2[end] - s2[start], n
+
+    def update(self, candles: pd.DataFrame) -> pd.DataFrame:
+        """
+        Process bars newer than the last update and append their estimates. If the
+        last processed bar has changed since, it is processed again.
+
+        Parameters
+        ----------
+        candles : pd.DataFrame
+            OHLC candles. May be the full history; already-seen bars are skipped.
+
+        Returns
+        -------
+        pd.DataFrame
+            Estimates for the new (and any revised) bars only.
+        """
+        if self.last_index is not None and self.last_index in candles.index:
+            bar = candles.loc[self.last_index, ["High", "Low", "Close"]]
+            bar = bar.to_numpy(dtype=float)
+            if not np.array_equal(bar, self.last_bar, equal_nan=True):
+                self.undo_last()
+        if self.last_index is not None:
+            candles = candles.loc[candles.index > self.last_index]
+        if candles.empty:
+            return pd.DataFrame(columns=self.columns, dtype=float)
+        close = candles["Close"].to_numpy(dtype=float)
+        high = candles["High"].to_numpy(dtype=float)
+        low = candles["Low"].to_numpy(dtype=float)
+        first = np.nan if self.last_close is None else self.last_close
+        previous = np.concatenate(([first], close[:-1]))
+        returns = np.log(close / previous)
+        ranges = np.log(high / low) ** 2
+
+        # Close-to-close
+        total, total_sq, n = self.rolling(self.returns, returns)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = (total_sq - total**2 / n) / (n - 1)
+        close_vol = np.where(n >= self.window, np.sqrt(np.maximum(var, 0)), np.nan)
+        # Parkinson
+        total, _, n = self.rolling(self.ranges, ranges)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = total / (4 * np.log(2) * n)
+        parkinson_vol = np.where(n >= self.window, np.sqrt(var), np.nan)
+        # EWMA (recursive, one pass over the new bars)
+        ewma_vol = np.full(len(returns), np.nan)
+        lam = self.ewma_lambda
+        variance = self.ewma_variance
+        for i, r in enumerate(returns):
+            if i == len(returns) - 1:
+                previous_variance = variance
+            if np.isnan(r):
+                continue
+            variance = r**2 if variance is None else lam * variance + (1 - lam) * r**2
+            ewma_vol[i] = np.sqrt(variance)
+
+        annualize = np.sqrt(self.trading_days)
+        df = pd.DataFrame(
+            {
+                "close": close_vol * annualize,
+                "parkinson": parkinson_vol * annualize,
+                "ewma": ewma_vol * annualize,
+            },
+            index=candles.index,
+        )
+        # Carry state forward, keeping the state from before the last bar.
+        all_returns = np.concatenate([self.returns, returns])
+        all_ranges = np.concatenate([self.ranges, ranges])
+        self.rollback = {
+            "returns": all_returns[:-1][-self.window :],
+            "ranges": all_ranges[:-1][-self.window :],
+            "ewma_variance": previous_variance,
+            "last_close": self.last_close if len(close) == 1 else close[-2],
+            "last_index": self.last_index if len(close) == 1 else candles.index[-2],
+            "last_bar": self.last_bar
+            if len(close) == 1
+            else np.array([high[-2], low[-2], close[-2]]),
+        }
+        self.returns = all_returns[-self.window :]
+        self.ranges = all_ranges[-self.window :]
+        self.ewma_variance = variance
+        self.last_close = close[-1]
+        self.last_index = candles.index[-1]
+        self.last_bar = np.array([high[-1], low[-1], close[-1]])
+        self.chunks.append(df)
+        return df
+
+    def undo_last(self):
+        """
+        Drop the last bar's estimate and restore the state from before it.
+        """
+        for name, value in self.rollback.items():
+            setattr(self, name, value)
+        self.rollback = None
+        if self.chunks:
+            self.chunks[-1] = self.chunks[-1].iloc[:-1]
+            if self.chunks[-1].empty:
+                self.chunks.pop()
+        else:
+            self.joined = self.joined.iloc[:-1]
+
+    def latest(self) -> pd.Series:
+        if self.chunks:
+            return self.chunks[-1].iloc[-1]
+        if self.joined.empty:
+            return pd.Series({c: np.nan for c in self.columns})
+        return self.joined.iloc[-1]
+
+
+class RealizedVolatilityUniverse:
+    def __init__(self, **kwargs) -> None:
+        """
+        One 'RealizedVolatility' per ticker. Refreshing a ticker only processes the bars
+        that arrived since its last refresh.
+
+        Parameters
+        ----------
+        **kwargs
+            Passed to every 'RealizedVolatility'.
+        """
+        self.kwargs = kwargs
+        self.trackers = {}
+
+    def get(self, ticker: str) -> RealizedVolatility:
+        """
+        The ticker's tracker, created on first use. Pass it to 'OptionsChain' or
+        'OptionsBacktest' as 'realized_volatility' to keep its state across rebuilds.
+        """
+        ticker = ticker.upper()
+        if ticker not in self.trackers:
+            self.trackers[ticker] = RealizedVolatility(**self.kwargs)
+        return self.trackers[ticker]
+
+    def update(self, ticker: str, candles: pd.DataFrame) -> pd.DataFrame:
+        return self.get(ticker).update(candles)
+
+    def update_all(self, candles: dict):
+        for ticker, df in candles.items():
+            self.update(ticker, df)
+
+    def latest(self) -> pd.DataFrame:
+        """
+        Latest estimates for every ticker, indexed by ticker.
+        """
+        data = {t: v.latest() for t, v in self.trackers.items()}
+        return pd.DataFrame.from_dict(data, orient="index")
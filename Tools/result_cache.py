@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "options_trading", "results.sqlite"
+)
+
+
+def data_version(candles: pd.DataFrame) -> str:
+    """
+    Hash of the candle dates and OHLC values. Changes whenever a bar is added or revised.
+    """
+    digest = hashlib.sha1()
+    if isinstance(candles.index, pd.DatetimeIndex):
+        digest.update(candles.index.asi8.tobytes())
+    else:
+        digest.update("\n".join(map(str, candles.index)).encode())
+    columns = [c for c in ["Open", "High", "Low", "Close"] if c in candles.columns]
+    digest.update(np.ascontiguousarray(candles[columns].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path: str = "", max_entries: int = 100_000) -> None:
+        """
+        Disk-backed cache of backtest results in SQLite.
+
+        Entries are grouped by a 'scope' (one candle history, e.g. ticker and period)
+        and tagged with the 'data_version' of the candles they were computed from.
+        Storing a result under a new version deletes that scope's older versions, so
+        stale results go away as soon as new bars arrive. Past 'max_entries' the least
+        recently used entries are evicted, down to 90% of the limit.
+
+        Parameters
+        ----------
+        path : str, optional
+            Database file. Defaults to $OPTIONS_CACHE or
+            ~/.cache/options_trading/results.sqlite
+        max_entries : int, optional
+            Most entries kept, by default 100,000
+        """
+        self.path = path or os.environ.get("OPTIONS_CACHE", DEFAULT_PATH)
+        self.max_entries = max_entries
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_scope ON results (scope, version)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+        )
+        self.hits = 0
+        self.misses = 0
+        # Running row count, so inserts do not scan the table. Other processes sharing
+        # the file make it approximate; it is resynced whenever eviction runs.
+        self.count = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def make_key(self, scope: str, version: str, params: dict) -> str:
+        text = json.dumps([scope, version, params], sort_keys=True, default=str)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(self, scope: str, version: str, params: dict):
+        """
+        Cached value, or None if missing.
+        """
+        key = self.make_key(scope, version, params)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.connection.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0])
+
+    def set(self, scope: str, version: str, params: dict, value):
+        key = self.make_key(scope, version, params)
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                # New bars mean a new version. Everything older in this scope is stale.
+                deleted = self.connection.execute(
+                    "DELETE FROM results WHERE scope = ? AND version != ?",
+                    (scope, version),
+                ).rowcount
+                exists = self.connection.execute(
+                    "SELECT 1 FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (key, scope, version, json.dumps(value, default=str), time.time()),
+                )
+                self.count += (exists is None) - deleted
+                if self.count > self.max_entries:
+                    self.evict()
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def evict(self):
+        # Trim to 90% of the limit, so the count is only resynced once per 10% of inserts.
+        (self.count,) = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = self.count - int(self.max_entries * 0.9)
+        if self.count > self.max_entries:
+            self.connection.execute(
+                """
+                DELETE FROM results WHERE key IN (
+                    SELECT key FROM results ORDER BY accessed LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+            self.count -= excess
+
+    def get_or_compute(self, scope: str, version: str, params: dict, func):
+        value = self.get(scope, version, params)
+        if value is None:
+            value = func()
+            self.set(scope, version, params, value)
+        return value
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM results")
+            self.count = 0
+
+    def close(self):
+        self.connection.close()
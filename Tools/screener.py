@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Custom
+from Tools.options_chain import OptionsChain
+from Tools.realized_volatility import RealizedVolatilityUniverse
+
+
+class Screener:
+    def __init__(
+        self,
+        option_type: str = "put",
+        rank="annual_yield",
+        k: int = 20,
+        ascending: bool = False,
+        dte_range: tuple = (0, np.inf),
+        delta_band: tuple = (0, 1),
+        min_oi: int = 0,
+        min_credit: float = 0,
+        expiration_date: str = "",
+        backtest_period: str = "max",
+        chain_factory=None,
+    ) -> None:
+        """
+        Screen enriched chains across many tickers and keep only the best 'k' contracts.
+
+        Chains are processed one ticker at a time and merged into a bounded top-K with
+        'np.argpartition', so memory does not grow with the size of the universe.
+
+        Parameters
+        ----------
+        option_type : str, optional
+            "call" or "put", by default "put"
+        rank : str | callable, optional
+            Column name, a 'DataFrame.eval' expression (e.g. "annual_yield * probability")
+            or a function taking the enriched frame and returning scores, by default "annual_yield"
+        k : int, optional
+            Number of contracts to keep, by default 20
+        ascending : bool, optional
+            Rank lowest scores first, by default False
+        dte_range : tuple, optional
+            Inclusive (min, max) days to expiration, by default (0, np.inf)
+        delta_band : tuple, optional
+            Inclusive (min, max) absolute delta, by default (0, 1)
+        min_oi : int, optional
+            Minimum open interest, by default 0
+        min_credit : float, optional
+            Minimum 'sell_credit' in dollars per contract, by default 0
+        expiration_date : str, optional
+            Expiration passed to 'OptionsChain'. Empty uses the nearest, by default ""
+        backtest_period : str, optional
+            Candle period for the probability column, by default "max"
+        chain_factory : callable, optional
+            Function taking a ticker and returning an enriched chain (the output of
+            'apply_peripherals'). By default an 'OptionsChain' is built per ticker.
+        """
+        if option_type not in ["call", "put"]:
+            raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+        self.option_type = option_type
+        self.rank = rank
+        self.k = k
+        self.ascending = ascending
+        self.dte_range = dte_range
+        self.delta_band = delta_band
+        self.min_oi = min_oi
+        self.min_credit = min_credit
+        self.expiration_date = expiration_date
+        self.backtest_period = backtest_period
+        if chain_factory is None:
+            chain_factory = self.get_chain
+        self.chain_factory = chain_factory
+        self.errors = {}
+        # Per-ticker realized volatility kept across runs, so a refresh only
+        # processes bars that arrived since the last one.
+        self.realized_volatility = RealizedVolatilityUniverse()
+
+    # ---------- Chains ---------- #
+    def get_chain(self, ticker: str) -> pd.DataFrame:
+        oc = OptionsChain(
+            ticker,
+            call=self.option_type == "call",
+            put=self.option_type == "put",
+            expiration_date=self.expiration_date,
+            buy=False,
+            sell=True,
+            backtest_period=self.backtest_period,
+            realized_volatility=self.realized_volatility.get(ticker),
+        )
+        if self.option_type == "call":
+            return oc.get_calls()
+        return oc.get_puts()
+
+    def stream(self, tickers: list):
+        """
+        Yield (ticker, filtered chain) one ticker at a time.
+
+        Tickers that fail to load are recorded in 'self.errors' and skipped.
+        """
+        for ticker in tickers:
+            try:
+                df = self.chain_factory(ticker)
+            except Exception as e:
+                self.errors[ticker] = e
+                continue
+            df = df[self.filter(df)]
+            if df.empty:
+                continue
+            df.insert(0, "ticker", ticker.upper())
+            yield ticker, df
+
+    # ---------- Filters ---------- #
+    def filter(self, df: pd.DataFrame) -> pd.Series:
+        delta = df["delta"].abs()
+        mask = df["DTE"].between(*self.dte_range)
+        mask &= delta.between(*self.delta_band)
+        mask &= df["OI"].fillna(0) >= self.min_oi
+        mask &= df["sell_credit"] >= self.min_credit
+        return mask
+
+    # ---------- Ranking ---------- #
+    def score(self, df: pd.DataFrame) -> np.ndarray:
+        if callable(self.rank):
+            scores = self.rank(df)
+        elif self.rank in df.columns:
+            scores = df[self.rank]
+        else:
+            scores = df.eval(self.rank)
+        scores = np.asarray(scores, dtype=float)
+        # Lower is better once negated for descending ranks. NaN always ranks last.
+        if not self.ascending:
+            scores = -scores
+        return np.where(np.isnan(scores), np.inf, scores)
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keep the best 'k' rows of 'df' using 'np.argpartition' (unsorted).
+        """
+        if len(df) <= self.k:
+            return df
+        scores = self.score(df)
+        keep = np.argpartition(scores, self.k - 1)[: self.k]
+        return df.iloc[keep]
+
+    def run(self, tickers: list) -> pd.DataFrame:
+        """
+        Screen every ticker and return the top 'k' contracts, best first.
+
+        Parameters
+        ----------
+        tickers : list
+            Ticker symbols.
+
+        Returns
+        -------
+        pd.DataFrame
+            At most 'k' rows with a leading 'ticker' column and a 'score' column.
+        """
+        top = pd.DataFrame()
+        for _, df in self.stream(tickers):
+            # Reduce each chain before merging so the concat stays at most 2k rows.
+            df = self.select(df)
+            top = df if top.empty else self.select(pd.concat([top, df]))
+        if top.empty:
+            return top
+        scores = self.score(top)
+        order = np.argsort(scores, kind="stable")
+        top = top.iloc[order].reset_index(drop=True)
+        top["score"] = scores[order] if self.ascending else -scores[order]
+        return top
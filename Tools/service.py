@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+# Custom
+from Tools.data_source import YahooDataSource
+from Tools.options_chain import OptionsChain
+
+
+class AnalyticsService:
+    def __init__(
+        self,
+        data_source=None,
+        backtest_period: str = "max",
+        max_workers: int = 4,
+        ttl: float = 300.0,
+        max_chains: int = 256,
+    ) -> None:
+        """
+        Long-running service that keeps chains, candles, windows and rates warm.
+
+        'OptionsChain' objects are cached per (ticker, option type, expiration), and each
+        one holds its 'OptionsBacktest', computed windows and risk-free rate. Identical
+        requests arriving while one is in flight share a single computation.
+        Cached chains are rebuilt once older than 'ttl' seconds, the least recently
+        used ones are dropped past 'max_chains', and '/refresh' drops them on demand.
+
+        Parameters
+        ----------
+        data_source : optional
+            Object with 'download' and 'option_chain' methods, by default 'YahooDataSource'.
+            Use 'FakeDataSource' to run offline.
+        backtest_period : str, optional
+            Candle period for the probability column, by default "max"
+        max_workers : int, optional
+            Threads used for blocking data and pandas work, by default 4
+        ttl : float, optional
+            Seconds a cached chain (quotes, spot, rate and candles) is served, by default 300
+        max_chains : int, optional
+            Most chains kept, by default 256
+        """
+        if data_source is None:
+            data_source = YahooDataSource()
+        self.data_source = data_source
+        self.backtest_period = backtest_period
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.ttl = ttl
+        self.max_chains = max_chains
+        # (ticker, option type, expiration) -> (OptionsChain, build time), in LRU order.
+        self.chains = OrderedDict()
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.routes = {
+            "/health": self.health,
+            "/chain": self.chain,
+            "/probability": self.probability,
+            "/report": self.report,
+            "/refresh": self.refresh,
+        }
+
+    # ---------- Coalescing ---------- #
+    async def coalesce(self, key: tuple, func, *args):
+        """
+        Run 'func' in the executor once per 'key' while a call with that key is pending.
+        """
+        if key in self.inflight:
+            return await asyncio.shield(self.inflight[key])
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, func, *args)
+        self.inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+
+    # ---------- Chains ---------- #
+    def get_chain(self, ticker: str, option_type: str, expiration_date: str):
+        key = (ticker.upper(), option_type, expiration_date)
+        with self.lock:
+            lock = self.locks.setdefault(key, threading.Lock())
+        with lock:
+            with self.lock:
+                entry = self.chains.get(key)
+                if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                    entry = None
+                if entry is not None:
+                    self.chains.move_to_end(key)
+            if entry is None:
+                oc = OptionsChain(
+                    ticker,
+                    call=option_type == "call",
+                    put=option_type == "put",
+                    expiration_date=expiration_date,
+                    buy=False,
+                    sell=True,
+                    backtest_period=self.backtest_period,
+                    data_source=self.data_source,
+                )
+                entry = (oc, time.monotonic())
+                with self.lock:
+                    self.chains[key] = entry
+                    self.chains.move_to_end(key)
+                    self.evict()
+        return entry[0], lock
+
+    def evict(self):
+        # Caller holds 'self.lock'.
+        while len(self.chains) > self.max_chains:
+            self.chains.popitem(last=False)
+        # Drop locks of keys no longer cached (evicted, refreshed or failed builds).
+        for key in [k for k, l in self.locks.items() if k not in self.chains]:
+            if not self.locks[key].locked():
+                del self.locks[key]
+
+    def drop_chains(self, ticker: str, option_type: str = "", expiration_date: str = ""):
+        """
+        Drop cached chains for 'ticker', optionally only one option type/expiration.
+        """
+        with self.lock:
+            keys = [
+                k
+                for k in self.chains
+                if k[0] == ticker.upper()
+                and option_type in ["", k[1]]
+                and expiration_date in ["", k[2]]
+            ]
+            for key in keys:
+                del self.chains[key]
+            self.evict()
+        return len(keys)
+
+    def get_enriched(self, ticker: str, option_type: str, expiration_date: str):
+        oc, lock = self.get_chain(ticker, option_type, expiration_date)
+        with lock:
+            if option_type == "call":
+                return oc, oc.get_calls()
+            return oc, oc.get_puts()
+
+    def get_row(self, ticker, option_type, expiration_date, strike: float):
+        oc, df = self.get_enriched(ticker, option_type, expiration_date)
+        rows = df[df["strike"] == strike]
+        if rows.empty:
+            raise KeyError(f"Strike {strike} not found for {ticker}")
+        return oc, rows.iloc[0]
+
+    def compute_probability(self, ticker, option_type, expiration_date, strike, period):
+        oc, row = self.get_row(ticker, option_type, expiration_date, strike)
+        _, lock = self.get_chain(ticker, option_type, expiration_date)
+        with lock:
+            return oc.get_period_backtest(period).get_probability(
+                strike,
+                expiration_date=row["expirationDate"],
+                option_type=option_type,
+                return_value=False,
+                return_dict=True,
+                as_of=oc.current_date,
+                manual_stock_price=oc.get_stock_price(),
+            )
+
+    def compute_report(self, ticker, option_type, expiration_date, strike, periods):
+        oc, row = self.get_row(ticker, option_type, expiration_date, strike)
+        _, lock = self.get_chain(ticker, option_type, expiration_date)
+        with lock:
+            return oc.get_report(row, option_type, backtest_periods=periods)
+
+    # ---------- Routes ---------- #
+    def parse(self, query: dict):
+        ticker = query["ticker"][0]
+        option_type = query.get("type", ["put"])[0]
+        if option_type not in ["call", "put"]:
+            raise ValueError("Invalid type. Use 'call' or 'put'.")
+        expiration_date = query.get("expiration", [""])[0]
+        return ticker.upper(), option_type, expiration_date
+
+    async def refresh(self, query: dict):
+        ticker = query["ticker"][0]
+        option_type = query.get("type", [""])[0]
+        expiration_date = query.get("expiration", [""])[0]
+        return {"dropped": self.drop_chains(ticker, option_type, expiration_date)}
+
+    async def health(self, query: dict):
+        return {"status": "ok", "chains": len(self.chains)}
+
+    async def chain(self, query: dict):
+        args = self.parse(query)
+        oc, df = await self.coalesce(("chain",) + args, self.get_enriched, *args)
+        return json.loads(df.to_json(orient="records"))
+
+    async def probability(self, query: dict):
+        args = self.parse(query)
+        strike = float(query["strike"][0])
+        period = query.get("period", [self.backtest_period])[0]
+        key = ("probability",) + args + (strike, period)
+        return await self.coalesce(
+            key, self.compute_probability, *args, strike, period
+        )
+
+    async def report(self, query: dict):
+        args = self.parse(query)
+        strike = float(query["strike"][0])
+        periods = query.get("periods", ["1Y,5Y,10Y,max"])[0].split(",")
+        key = ("report",) + args + (strike, tuple(periods))
+        return await self.coalesce(key, self.compute_report, *args, strike, periods)
+
+    # ---------- HTTP ---------- #
+    def to_json(self, data) -> bytes:
+        def default(o):
+            if isinstance(o, np.generic):
+                return o.item()
+            if isinstance(o, (pd.Timestamp, np.datetime64)):
+                return str(o)
+            raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+        return json.dumps(data, default=default).encode()
+
+    async def dispatch(self, target: str):
+        url = urlsplit(target)
+        route = self.routes.get(url.path)
+        if route is None:
+            return 404, {"error": f"Unknown path {url.path}"}
+        try:
+            return 200, await route(parse_qs(url.query))
+        except (KeyError, ValueError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode().split()
+            # Drain headers. Only bodiless GET requests are supported.
+            while (await reader.readline()) not in [b"\r\n", b"\n", b""]:
+                pass
+            if len(request_line) < 2 or request_line[0] != "GET":
+                status, data = 405, {"error": "Only GET is supported"}
+            else:
+                status, data = await self.dispatch(request_line[1])
+            body = self.to_json(data)
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}.get(status, "Error")
+            header = (
+                f"HTTP/1.1 {status} {reason}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(header.encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, path: str = ""):
+        """
+        Serve until cancelled. A Unix socket is used when 'path' is set.
+        """
+        if path:
+            server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Local options analytics service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default="", help="Serve on a Unix socket path.")
+    parser.add_argument("--period", default="max", help="Backtest period.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ttl", type=float, default=300.0, help="Chain cache seconds.")
+    parser.add_argument("--max-chains", type=int, default=256)
+    args = parser.parse_args(argv)
+    service = AnalyticsService(
+        backtest_period=args.period,
+        max_workers=args.workers,
+        ttl=args.ttl,
+        max_chains=args.max_chains,
+    )
+    asyncio.run(service.serve(args.host, args.port, args.unix))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = ["Close", "High", "Low"]
+
+# Worker-side state: specs received from the pool initializer and the blocks
+# attached from them, keyed by ticker.
+_specs = {}
+_attached = {}
+
+
+class SharedCandles:
+    def __init__(self, candles: dict, columns: list = COLUMNS) -> None:
+        """
+        Publish candle arrays once into shared memory so worker processes can read
+        them without a copy.
+
+        Each ticker becomes one (bars, columns) float64 block. 'specs' holds the small,
+        picklable description workers need to attach. Blocks are unlinked by 'close',
+        on leaving a 'with' block, or at interpreter exit, whichever comes first.
+
+        Parameters
+        ----------
+        candles : dict
+            Candle DataFrames keyed by ticker.
+        columns : list, optional
+            Columns to publish, by default ["Close", "High", "Low"]
+        """
+        self.columns = list(columns)
+        self.specs = {}
+        self.blocks = {}
+        self.arrays = {}
+        try:
+            for ticker, df in candles.items():
+                self.publish(ticker, df)
+        except Exception:
+            self.close()
+            raise
+        atexit.register(self.close)
+
+    def publish(self, ticker: str, candles: pd.DataFrame):
+        ticker = ticker.upper()
+        values = np.ascontiguousarray(candles[self.columns].to_numpy(dtype=np.float64))
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        array = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+        array[:] = values
+        self.blocks[ticker] = block
+        self.arrays[ticker] = array
+        self.specs[ticker] = {
+            "name": block.name,
+            "shape": values.shape,
+            "dtype": values.dtype.str,
+            "columns": self.columns,
+        }
+
+    def get_array(self, ticker: str) -> np.ndarray:
+        return self.arrays[ticker.upper()]
+
+    def close(self):
+        # Drop views first, otherwise the buffers cannot be released.
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self.blocks.clear()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------- Worker ---------- #
+def attach(specs: dict):
+    """
+    Pool initializer. Only the specs are sent; blocks are attached on first use.
+    """
+    _specs.clear()
+    _specs.update(specs)
+    atexit.register(detach)
+
+
+def detach():
+    for block, _ in _attached.values():
+        block.close()
+    _attached.clear()
+
+
+def get_array(ticker: str) -> np.ndarray:
+    ticker = ticker.upper()
+    if ticker not in _attached:
+        spec = _specs[ticker]
+        block = shared_memory.SharedMemory(name=spec["name"])
+        array = np.ndarray(spec["shape"], dtype=np.dtype(spec["dtype"]), buffer=block.buf)
+        _attached[ticker] = (block, array)
+    return _attached[ticker][1]
+
+
+def get_column(ticker: str, column: str) -> np.ndarray:
+    return get_array(ticker)[:, _specs[ticker.upper()]["columns"].index(column)]
+
+
+# ---------- Probability ---------- #
+def window_probability(
+    close: np.ndarray,
+    extreme: np.ndarray,
+    window: int,
+    strike_price: float,
+    option_type: str,
+    option_side: str,
+    manual_stock_price: float = 0,
+) -> dict:
+    """
+    Vectorized equivalent of 'Backtest.get_probability' on raw arrays.
+
+    Candles are cut into back-to-back sections of 'window' + 1 bars. Each section's
+    outlier is the lowest change from its first close to the lows (puts) or highs
+    (calls) of the bars that follow.
+
+    Parameters
+    ----------
+    close : np.ndarray
+        Close prices.
+    extreme : np.ndarray
+        Lows for puts, highs for calls.
+    window : int
+        Number of days to expiration. Must be at least 1.
+    strike_price : float
+        Strike price of the contract
+    option_type : str
+        "call" or "put"
+    option_side : str
+        Whether you are buying or selling the option. "buy" or "sell"
+    manual_stock_price : float, optional
+        Stock price to measure the strike from. If 0, the last close, by default 0
+
+    Returns
+    -------
+    dict
+        "total", "match", "distance" and "probability" (as a decimal).
+    """
+    if option_type not in ["call", "put"]:
+        raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+    if window < 1:
+        raise ValueError("window must be at least 1.")
+    last_price = close[-1] if manual_stock_price == 0 else manual_stock_price
+    strike_spread = (strike_price - last_price) / abs(last_price)
+    size = window + 1
+    sections = len(close) // size
+    anchor = close[: sections * size : size]
+    following = extreme[: sections * size].reshape(sections, size)[:, 1:]
+    outlier = ((following - anchor[:, None]) / np.abs(anchor)[:, None]).min(axis=1)
+    if option_type == "put":
+        match = int(np.count_nonzero(outlier < strike_spread))
+    else:
+        match = int(np.count_nonzero(outlier > strike_spread))
+    probability = match / sections if sections else np.nan
+    if option_side == "sell":
+        probability = 1 - probability
+    return {
+        "total": sections,
+        "match": match,
+        "distance": strike_spread,
+        "probability": probability,
+    }
+
+
+def _probability_task(task):
+    ticker, strike_price, window, option_type, option_side = task
+    extreme = "Low" if option_type == "put" else "High"
+    return window_probability(
+        get_column(ticker, "Close"),
+        get_column(ticker, extreme),
+        window,
+        strike_price,
+        option_type,
+        option_side,
+    )
+
+
+def get_probabilities(
+    candles,
+    tasks: list,
+    option_type: str = "put",
+    option_side: str = "sell",
+    max_workers: int = None,
+    chunksize: int = 64,
+) -> pd.DataFrame:
+    """
+    Run many (ticker, strike, window) probability backtests across worker processes.
+
+    Candles are published to shared memory once. Each task sent to a worker is only
+    its descriptor, so memory use does not grow with the worker count.
+
+    Parameters
+    ----------
+    candles : dict | SharedCandles
+        Candle DataFrames keyed by ticker, or already published candles. Blocks
+        published here are unlinked before returning.
+    tasks : list
+        (ticker, strike_price, window) tuples.
+    option_type : str, optional
+        "call" or "put", by default "put"
+    option_side : str, optional
+        "buy" or "sell", by default "sell"
+    max_workers : int, optional
+        Process count, by default the number of CPUs.
+    chunksize : int, optional
+        Tasks sent to a worker at a time, by default 64
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per task indexed by (ticker, strike, window).
+    """
+    owned = not isinstance(candles, SharedCandles)
+    shared = SharedCandles(candles) if owned else candles
+    try:
+        jobs = [(t.upper(), s, w, option_type, option_side) for t, s, w in tasks]
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=attach, initargs=(shared.specs,)
+        ) as pool:
+            results = list(pool.map(_probability_task, jobs, chunksize=chunksize))
+    finally:
+        if owned:
+            shared.close()
+    index = pd.MultiIndex.from_tuples(
+        [job[:3] for job in jobs], names=["ticker", "strike", "window"]
+    )
+    return pd.DataFrame(results, index=index)
@@ -0,0 +1,242 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Custom
+from Tools import black_scholes as bs
+
+
+class StrategyBacktest:
+    def __init__(
+        self,
+        candles: pd.DataFrame,
+        option_type: str = "put",
+        risk_free_rate: float = 0.04,
+        vol_window: int = 20,
+        contracts: int = 1,
+        on_assignment: str = "close",
+    ) -> None:
+        """
+        Simulate selling cash-secured puts or covered calls over historical candles.
+
+        Premiums are synthetic: Black-Scholes priced with the trailing realized volatility
+        as the IV proxy. Every cycle opens on a close and expires 'dte' candles later.
+
+        Parameters
+        ----------
+        candles : pd.DataFrame
+            DataFrame containing OHLCV candle data.
+        option_type : str, optional
+            "put" for cash-secured puts, "call" for covered calls, by default "put"
+        risk_free_rate : float, optional
+            Annual risk-free rate as a decimal, by default 0.04
+        vol_window : int, optional
+            Candles used for the realized volatility proxy, by default 20
+        contracts : int, optional
+            Contracts sold per cycle, by default 1
+        on_assignment : str, optional
+            "close" settles an ITM expiration at intrinsic and re-selects the strike.
+            "roll" settles it the same way but re-sells the same strike next cycle,
+            by default "close"
+
+        Notes
+        -----
+        Assignment is modelled as cash settlement at intrinsic value: no shares change
+        hands. Each cycle is sized against its own collateral (strike for puts, spot for
+        covered calls) and cycle returns compound, so equity reflects reinvesting the
+        account rather than a fixed first-cycle notional. "premium" and "total_pnl" are
+        in dollars at that compounded size, so "total_pnl" is the equity curve's final
+        gain. "premium" is the extrinsic (time) value only, since a re-sold ITM strike's
+        intrinsic value is paid straight back at settlement.
+        """
+        if option_type not in ["call", "put"]:
+            raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+        if on_assignment not in ["close", "roll"]:
+            raise ValueError("Invalid on_assignment. Use 'close' or 'roll'.")
+        self.candles = candles
+        self.option_type = option_type
+        self.risk_free_rate = risk_free_rate
+        self.vol_window = vol_window
+        self.contracts = contracts
+        self.on_assignment = on_assignment
+        self.close = candles["Close"].to_numpy(dtype=float)
+        self.dates = candles.index
+        self.volatility = self.realized_volatility(self.close, vol_window)
+
+    # ---------- Realized Volatility ---------- #
+    def realized_volatility(self, close: np.ndarray, window: int) -> np.ndarray:
+        """
+        Annualized rolling close-to-close volatility in O(N) using cumulative sums.
+
+        Parameters
+        ----------
+        close : np.ndarray
+            Closing prices.
+        window : int
+            Number of log returns per estimate.
+
+        Returns
+        -------
+        np.ndarray
+            Volatility aligned to 'close'. The first 'window' values are NaN.
+        """
+        returns = np.diff(np.log(close))
+        vol = np.full(len(close), np.nan)
+        if len(returns) < window:
+            return vol
+        s1 = np.concatenate(([0.0], np.cumsum(returns)))
+        s2 = np.concatenate(([0.0], np.cumsum(returns**2)))
+        total = s1[window:] - s1[:-window]
+        total_sq = s2[window:] - s2[:-window]
+        var = (total_sq - total**2 / window) / (window - 1)
+        vol[window:] = np.sqrt(np.maximum(var, 0) * 252)
+        return vol
+
+    # ---------- Simulation ---------- #
+    def run(self, dte: int, targets, target_type: str = "delta") -> dict:
+        """
+        Simulate one DTE for every strike target at once.
+
+        Parameters
+        ----------
+        dte : int
+            Candles between entry and expiration.
+        targets : list | np.ndarray
+            Absolute deltas (e.g. 0.30) or distances from price as a decimal (e.g. 0.05).
+        target_type : str, optional
+            "delta" or "distance", by default "delta"
+
+        Returns
+        -------
+        dict
+            "summary" DataFrame indexed by target, "equity" DataFrame indexed by
+            expiration date with one column per target.
+        """
+        targets = np.atleast_1d(np.asarray(targets, dtype=float))
+        entries = np.arange(self.vol_window, len(self.close) - dte, dte)
+        if len(entries) == 0:
+            raise ValueError("Not enough candles for the requested DTE.")
+        exits = entries + dte
+        T = dte / 252
+        r = self.risk_free_rate
+        # (cycles, targets)
+        spot = self.close[entries][:, None]
+        final = self.close[exits][:, None]
+        sigma = self.volatility[entries][:, None]
+        strikes = self.select_strikes(spot, sigma, T, targets[None, :], target_type)
+        assigned = self.is_assigned(strikes, final)
+        if self.on_assignment == "roll":
+            # Sequential in time, still vectorized across targets.
+            for i in range(1, len(entries)):
+                strikes[i] = np.where(assigned[i - 1], strikes[i - 1], strikes[i])
+                assigned[i] = self.is_assigned(strikes[i], final[i])
+        premium = bs.calculate_price(spot, strikes, T, r, sigma, self.option_type)
+        if self.option_type == "put":
+            intrinsic = np.maximum(strikes - spot, 0)
+            pnl = premium - np.maximum(strikes - final, 0)
+            collateral = strikes
+        else:
+            # Covered call: share move plus premium, capped by the strike.
+            intrinsic = np.maximum(spot - strikes, 0)
+            pnl = (final - spot) + premium - np.maximum(final - strikes, 0)
+            collateral = np.broadcast_to(spot, strikes.shape)
+        returns = pnl / collateral
+        # Start from the first cycle's collateral and compound each cycle's return.
+        capital = collateral[0] * 100 * self.contracts
+        equity = capital * np.cumprod(1 + returns, axis=0)
+        # Dollar P&L and premium of each cycle, sized by the equity it opens with.
+        opening = np.vstack([capital[None, :], equity[:-1]])
+        pnl = returns * opening
+        premium = (premium - intrinsic) / collateral * opening
+
+        years = max((self.dates[exits[-1]] - self.dates[entries[0]]).days / 365.25, 1e-9)
+        peak = np.maximum.accumulate(np.vstack([capital[None, :], equity]), axis=0)[1:]
+        summary = pd.DataFrame(
+            {
+                "dte": dte,
+                "cycles": len(entries),
+                "premium": premium.sum(axis=0),
+                "total_pnl": equity[-1] - capital,
+                "win_rate": (pnl > 0).mean(axis=0),
+                "assignments": assigned.sum(axis=0),
+                "max_drawdown": ((equity - peak) / peak).min(axis=0),
+                "annual_return": (np.maximum(equity[-1] / capital, 0) ** (1 / years)) - 1,
+            },
+            index=pd.Index(targets, name=target_type),
+        )
+        equity = pd.DataFrame(equity, index=self.dates[exits], columns=targets)
+        return {"summary": summary, "equity": equity}
+
+    def select_strikes(self, spot, sigma, T, targets, target_type: str):
+        if target_type == "delta":
+            return bs.calculate_strike_from_delta(
+                spot, targets, T, self.risk_free_rate, sigma, self.option_type
+            )
+        elif target_type == "distance":
+            if self.option_type == "put":
+                return spot * (1 - targets)
+            return spot * (1 + targets)
+        else:
+            raise ValueError("Invalid target_type. Use 'delta' or 'distance'.")
+
+    def is_assigned(self, strikes, final):
+        if self.option_type == "put":
+            return final < strikes
+        return final > strikes
+
+    def sweep(self, dtes: list, targets, target_type: str = "delta") -> pd.DataFrame:
+        """
+        Run every DTE in 'dtes' against every target.
+
+        Returns
+        -------
+        pd.DataFrame
+            Summary indexed by (dte, target).
+        """
+        frames = [self.run(d, targets, target_type)["summary"] for d in dtes]
+        df = pd.concat(frames).reset_index()
+        return df.set_index(["dte", target_type])
+
+
+def _sweep_ticker(args):
+    ticker, candles, dtes, targets, target_type, kwargs = args
+    df = StrategyBacktest(candles, **kwargs).sweep(dtes, targets, target_type)
+    return ticker, df
+
+
+def sweep_tickers(
+    candles: dict,
+    dtes: list,
+    targets,
+    target_type: str = "delta",
+    max_workers: int = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Run 'StrategyBacktest.sweep' for many tickers across worker processes.
+
+    Parameters
+    ----------
+    candles : dict
+        Candle DataFrames keyed by ticker.
+    dtes : list
+        DTE values to simulate.
+    targets : list | np.ndarray
+        Delta or distance targets.
+    target_type : str, optional
+        "delta" or "distance", by default "delta"
+    max_workers : int, optional
+        Process count, by default the number of CPUs.
+    **kwargs
+        Passed to 'StrategyBacktest'.
+
+    Returns
+    -------
+    pd.DataFrame
+        Summary indexed by (ticker, dte, target).
+    """
+    tasks = [(t, c, dtes, targets, target_type, kwargs) for t, c in candles.items()]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = dict(pool.map(_sweep_ticker, tasks))
+    return pd.concat(results, names=["ticker"])
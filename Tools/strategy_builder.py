@@ -0,0 +1,376 @@
+import numpy as np
+import pandas as pd
+
+# Custom
+from Tools.options_chain import OptionsChain
+
+
+class StrategyBuilder:
+    def __init__(self, chain: OptionsChain) -> None:
+        """
+        Enumerate multi-leg strategies across the strikes of a single expiration.
+
+        Every pairing is evaluated with broadcast NumPy arrays. Width and credit
+        constraints are applied to the index pairs before anything else is computed,
+        so only surviving combinations are materialized.
+
+        Parameters
+        ----------
+        chain : OptionsChain
+            Chain for a single expiration date. Calls and puts are enriched through
+            'apply_peripherals' when they are first requested.
+        """
+        self.chain = chain
+        self.stock_price = chain.get_stock_price()
+        self.greeks = ["delta", "gamma", "theta", "vega"]
+        self.metrics = [
+            "credit",
+            "max_loss",
+            "return_on_risk",
+            "probability",
+            "expected_value",
+        ]
+
+    # ---------- Legs ---------- #
+    def get_legs(self, option_type: str) -> dict:
+        """
+        Convert an enriched chain into flat NumPy arrays sorted by strike.
+
+        Parameters
+        ----------
+        option_type : str
+            "call" or "put"
+
+        Returns
+        -------
+        dict
+            Arrays keyed by column name. Quotes without a bid are removed.
+        """
+        if option_type == "call":
+            df = self.chain.get_calls()
+        elif option_type == "put":
+            df = self.chain.get_puts()
+        else:
+            raise ValueError("Invalid option_type. Use 'call' or 'put'.")
+        df = df[df["bid"] > 0].sort_values("strike")
+        legs = {
+            "symbol": df["contractSymbol"].to_numpy(),
+            "strike": df["strike"].to_numpy(dtype=float),
+            "bid": df["bid"].to_numpy(dtype=float),
+            "ask": df["ask"].to_numpy(dtype=float),
+        }
+        for g in self.greeks:
+            legs[g] = df[g].to_numpy(dtype=float)
+        legs["TDTE"] = int(df["TDTE"].iloc[0]) if len(df) else 0
+        return legs
+
+    # ---------- Vertical Spreads ---------- #
+    def vertical_spreads(
+        self,
+        option_type: str,
+        min_width: float = 0,
+        max_width: float = np.inf,
+        min_credit: float = 0.01,
+    ) -> pd.DataFrame:
+        """
+        Enumerate every credit vertical (short leg closer to the money).
+
+        Parameters
+        ----------
+        option_type : str
+            "call" for bear call spreads, "put" for bull put spreads.
+        min_width : float, optional
+            Smallest distance between strikes, by default 0
+        max_width : float, optional
+            Largest distance between strikes, by default np.inf
+        min_credit : float, optional
+            Smallest net credit per share (short bid - long ask), by default 0.01
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per spread with net credit, max loss, breakeven and net Greeks.
+        """
+        legs = self.get_legs(option_type)
+        short, long = self._pair_verticals(
+            legs, option_type, min_width, max_width, min_credit
+        )
+        credit = legs["bid"][short] - legs["ask"][long]
+        width = np.abs(legs["strike"][short] - legs["strike"][long])
+        if option_type == "put":
+            lower = legs["strike"][short] - credit
+            upper = np.full(len(short), np.inf)
+        else:
+            lower = np.full(len(short), -np.inf)
+            upper = legs["strike"][short] + credit
+        data = {
+            "strategy": f"{option_type}_spread",
+            "short_symbol": legs["symbol"][short],
+            "long_symbol": legs["symbol"][long],
+            "short_strike": legs["strike"][short],
+            "long_strike": legs["strike"][long],
+            "width": width,
+        }
+        for g in self.greeks:
+            data[g] = legs[g][long] - legs[g][short]
+        return self._finalize(data, credit, width - credit, lower, upper, legs["TDTE"])
+
+    def _pair_verticals(
+        self,
+        legs: dict,
+        option_type: str,
+        min_width: float,
+        max_width: float,
+        min_credit: float,
+    ):
+        strikes = legs["strike"]
+        # Broadcast every (short, long) strike pair, positive when the long leg is further OTM.
+        if option_type == "put":
+            width = strikes[:, None] - strikes[None, :]
+        else:
+            width = strikes[None, :] - strikes[:, None]
+        short, long = np.nonzero((width > 0) & (width >= min_width) & (width <= max_width))
+        # Credit is only computed for pairs that survived the width constraint.
+        keep = legs["bid"][short] - legs["ask"][long] >= min_credit
+        return short[keep], long[keep]
+
+    # ---------- Strangles ---------- #
+    def strangles(
+        self, min_width: float = 0, max_width: float = np.inf, min_credit: float = 0.01
+    ) -> pd.DataFrame:
+        """
+        Enumerate every short strangle (short put strike below short call strike).
+
+        Parameters
+        ----------
+        min_width : float, optional
+            Smallest distance between the call and put strikes, by default 0
+        max_width : float, optional
+            Largest distance between the call and put strikes, by default np.inf
+        min_credit : float, optional
+            Smallest combined credit per share, by default 0.01
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per strangle. Max loss is unbounded and reported as inf.
+        """
+        puts = self.get_legs("put")
+        calls = self.get_legs("call")
+        width = calls["strike"][None, :] - puts["strike"][:, None]
+        p, c = np.nonzero((width > 0) & (width >= min_width) & (width <= max_width))
+        credit = puts["bid"][p] + calls["bid"][c]
+        keep = credit >= min_credit
+        p, c, credit = p[keep], c[keep], credit[keep]
+        data = {
+            "strategy": "strangle",
+            "put_symbol": puts["symbol"][p],
+            "call_symbol": calls["symbol"][c],
+            "put_strike": puts["strike"][p],
+            "call_strike": calls["strike"][c],
+            "width": calls["strike"][c] - puts["strike"][p],
+        }
+        for g in self.greeks:
+            data[g] = -(puts[g][p] + calls[g][c])
+        max_loss = np.full(len(p), np.inf)
+        lower = puts["strike"][p] - credit
+        upper = calls["strike"][c] + credit
+        return self._finalize(data, credit, max_loss, lower, upper, puts["TDTE"])
+
+    # ---------- Iron Condors ---------- #
+    def iron_condors(
+        self,
+        min_width: float = 0,
+        max_width: float = np.inf,
+        min_credit: float = 0.01,
+        max_candidates: int = 500,
+    ) -> pd.DataFrame:
+        """
+        Enumerate iron condors by pairing put credit spreads with call credit spreads.
+
+        Parameters
+        ----------
+        min_width : float, optional
+            Smallest wing width applied to each vertical, by default 0
+        max_width : float, optional
+            Largest wing width applied to each vertical, by default np.inf
+        min_credit : float, optional
+            Smallest combined credit per share, by default 0.01
+        max_candidates : int, optional
+            Verticals kept per side (highest credit first) before pairing. Bounds the
+            put x call broadcast for wide chains, by default 500
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per condor with net credit, max loss, breakevens and net Greeks.
+        """
+        puts = self.get_legs("put")
+        calls = self.get_legs("call")
+        # Each vertical must collect something for the condor to be worth holding.
+        ps, pl = self._pair_verticals(puts, "put", min_width, max_width, 0.01)
+        cs, cl = self._pair_verticals(calls, "call", min_width, max_width, 0.01)
+        put_credit = puts["bid"][ps] - puts["ask"][pl]
+        call_credit = calls["bid"][cs] - calls["ask"][cl]
+        ps, pl, put_credit = self._prune(ps, pl, put_credit, max_candidates)
+        cs, cl, call_credit = self._prune(cs, cl, call_credit, max_candidates)
+
+        # Short put must sit below short call.
+        valid = puts["strike"][ps][:, None] < calls["strike"][cs][None, :]
+        valid &= (put_credit[:, None] + call_credit[None, :]) >= min_credit
+        i, j = np.nonzero(valid)
+        credit = put_credit[i] + call_credit[j]
+        put_width = puts["strike"][ps][i] - puts["strike"][pl][i]
+        call_width = calls["strike"][cl][j] - calls["strike"][cs][j]
+        data = {
+            "strategy": "iron_condor",
+            "long_put": puts["strike"][pl][i],
+            "short_put": puts["strike"][ps][i],
+            "short_call": calls["strike"][cs][j],
+            "long_call": calls["strike"][cl][j],
+            "put_width": put_width,
+            "call_width": call_width,
+        }
+        for g in self.greeks:
+            data[g] = (
+                puts[g][pl][i] - puts[g][ps][i] + calls[g][cl][j] - calls[g][cs][j]
+            )
+        max_loss = np.maximum(put_width, call_width) - credit
+        lower = puts["strike"][ps][i] - credit
+        upper = calls["strike"][cs][j] + credit
+        return self._finalize(data, credit, max_loss, lower, upper, puts["TDTE"])
+
+    def _prune(self, short, long, credit, max_candidates: int):
+        if len(credit) <= max_candidates:
+            return short, long, credit
+        keep = np.argpartition(-credit, max_candidates - 1)[:max_candidates]
+        return short[keep], long[keep], credit[keep]
+
+    # ---------- Probability ---------- #
+    def breach_probability(self, lower, upper, window: int) -> np.ndarray:
+        """
+        Historical probability that price closes outside [lower, upper] at expiration.
+
+        Uses the windowed 'total_change' history from 'OptionsBacktest', sorted once,
+        and counts breaches for every strategy with 'np.searchsorted'.
+
+        Parameters
+        ----------
+        lower : np.ndarray
+            Lower breakeven prices (-inf if none).
+        upper : np.ndarray
+            Upper breakeven prices (inf if none).
+        window : int
+            Trading days to expiration.
+
+        Returns
+        -------
+        np.ndarray
+            Breach probability per strategy as a decimal.
+        """
+        changes = self.chain.backtest.get_windows(max(window, 1))["total_change"]
+        changes = np.sort(changes.dropna().to_numpy(dtype=float))
+        if len(changes) == 0:
+            return np.full(len(lower), np.nan)
+        lower_spread = (np.asarray(lower) - self.stock_price) / self.stock_price * 100
+        upper_spread = (np.asarray(upper) - self.stock_price) / self.stock_price * 100
+        below = np.searchsorted(changes, lower_spread, side="left")
+        above = len(changes) - np.searchsorted(changes, upper_spread, side="right")
+        return (below + above) / len(changes)
+
+    # ---------- Results ---------- #
+    def _finalize(self, data: dict, credit, max_loss, lower, upper, window: int):
+        df = pd.DataFrame(data)
+        df["credit"] = credit * 100
+        df["max_loss"] = max_loss * 100
+        df["return_on_risk"] = df["credit"] / df["max_loss"]
+        df["lower_breakeven"] = lower
+        df["upper_breakeven"] = upper
+        df["breach_probability"] = self.breach_probability(lower, upper, window)
+        df["probability"] = 1 - df["breach_probability"]
+        # Strangles have unbounded loss, so their expected value is left NaN.
+        bounded = np.isfinite(df["max_loss"])
+        df["expected_value"] = np.where(
+            bounded,
+            df["probability"] * df["credit"]
+            - df["breach_probability"] * df["max_loss"].where(bounded, 0),
+            np.nan,
+        )
+        return df
+
+    def top_k(self, strategies: pd.DataFrame, k: int = 10, metric: str = "credit"):
+        """
+        Return the best 'k' strategies by 'metric' without sorting the full frame.
+
+        Parameters
+        ----------
+        strategies : pd.DataFrame
+            Output of 'vertical_spreads', 'strangles' or 'iron_condors'.
+        k : int, optional
+            Number of rows to keep, by default 10
+        metric : str, optional
+            One of 'self.metrics'. "max_loss" ranks ascending, every other metric
+            descending, by default "credit". "expected_value" is NaN for strategies
+            with unbounded loss (strangles), which cannot be ranked by it.
+
+        Returns
+        -------
+        pd.DataFrame
+            Top 'k' rows, sorted.
+        """
+        if metric not in self.metrics:
+            raise ValueError(f"Invalid metric. Use one of {self.metrics}.")
+        if metric == "expected_value" and np.isinf(strategies["max_loss"]).any():
+            raise ValueError(
+                "Invalid metric. 'expected_value' is undefined for unbounded-loss strategies."
+            )
+        ascending = metric == "max_loss"
+        values = strategies[metric].to_numpy(dtype=float)
+        values = np.where(np.isnan(values), np.inf if ascending else -np.inf, values)
+        scores = values if ascending else -values
+        if len(scores) > k:
+            idx = np.argpartition(scores, k - 1)[:k]
+        else:
+            idx = np.arange(len(scores))
+        idx = idx[np.argsort(scores[idx], kind="stable")]
+        return strategies.iloc[idx].reset_index(drop=True)
+
+    def search(
+        self,
+        strategy: str,
+        k: int = 10,
+        metric: str = "credit",
+        **constraints,
+    ) -> pd.DataFrame:
+        """
+        Enumerate a strategy and return its top 'k' by 'metric'.
+
+        Parameters
+        ----------
+        strategy : str
+            "put_spread", "call_spread", "strangle" or "iron_condor"
+        k : int, optional
+            Number of rows to return, by default 10
+        metric : str, optional
+            Ranking column, by default "credit"
+        **constraints
+            Passed through to the enumerator (min_width, max_width, min_credit, ...).
+
+        Returns
+        -------
+        pd.DataFrame
+            Top 'k' strategies.
+        """
+        if strategy == "put_spread":
+            df = self.vertical_spreads("put", **constraints)
+        elif strategy == "call_spread":
+            df = self.vertical_spreads("call", **constraints)
+        elif strategy == "strangle":
+            df = self.strangles(**constraints)
+        elif strategy == "iron_condor":
+            df = self.iron_condors(**constraints)
+        else:
+            raise ValueError(
+                "Invalid strategy. Use 'put_spread', 'call_spread', 'strangle' or 'iron_condor'."
+            )
+        return self.top_k(df, k=k, metric=metric)
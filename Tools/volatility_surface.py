@@ -0,0 +1,235 @@
+import datetime as dt
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# Raw chains keyed by (ticker, snapshot): {"listed": expirations, "chains": {date: chain}}.
+# Fetching is the slow part, so chains are shared by every spot and rate.
+_chains = OrderedDict()
+# Fitted surfaces keyed by (ticker, snapshot, spot, rate, expirations). Refitting is cheap.
+_surfaces = OrderedDict()
+MAX_CHAINS = 32
+MAX_SURFACES = 256
+
+
+class VolatilitySurface:
+    def __init__(
+        self,
+        ticker: str,
+        stock_price: float,
+        chains: dict,
+        risk_free_rate: float = 0.0,
+        snapshot: str = "",
+        degree: int = 2,
+    ) -> None:
+        """
+        Implied volatility surface built from every expiration of a chain.
+
+        Each expiration gets a polynomial smile fit of total variance (IV^2 * T) against
+        log-moneyness, weighted by open interest. Between expirations total variance
+        is interpolated linearly in time at constant log-moneyness. Outside the listed
+        expirations, and outside each smile's fitted strikes, volatility is held flat.
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker symbol.
+        stock_price : float
+            Spot price used for log-moneyness.
+        chains : dict
+            Objects with 'calls' and 'puts' DataFrames keyed by expiration date "%Y-%m-%d".
+        risk_free_rate : float, optional
+            Annual rate as a decimal, used for the forward, by default 0.0
+        snapshot : str, optional
+            Date the chains were taken, "%Y-%m-%d". Defaults to today.
+        degree : int, optional
+            Polynomial degree of each smile, by default 2
+        """
+        self.ticker = ticker.upper()
+        self.stock_price = stock_price
+        self.risk_free_rate = risk_free_rate
+        self.snapshot = snapshot or dt.date.today().strftime("%Y-%m-%d")
+        self.degree = degree
+        self.date_format = "%Y-%m-%d"
+        self.fit(chains)
+
+    # ---------- Fit ---------- #
+    def forward(self, T):
+        return self.stock_price * np.exp(self.risk_free_rate * np.asarray(T))
+
+    def get_smile_data(self, chain, T: float) -> pd.DataFrame:
+        # Out-of-the-money quotes only: puts below the forward, calls above it.
+        F = self.forward(T)
+        puts = chain.puts[chain.puts["strike"] < F]
+        calls = chain.calls[chain.calls["strike"] >= F]
+        df = pd.concat([puts, calls])
+        df = df[(df["impliedVolatility"] > 0.001) & (df["bid"] > 0)]
+        return df
+
+    def fit(self, chains: dict):
+        snapshot = dt.datetime.strptime(self.snapshot, self.date_format).date()
+        expiries = []
+        coefficients = []
+        k_min = []
+        k_max = []
+        for expiration, chain in sorted(chains.items()):
+            date = dt.datetime.strptime(expiration, self.date_format).date()
+            T = max((date - snapshot).days, 1) / 365
+            df = self.get_smile_data(chain, T)
+            if df.empty:
+                continue
+            k = np.log(df["strike"].to_numpy(dtype=float) / self.forward(T))
+            w = df["impliedVolatility"].to_numpy(dtype=float) ** 2 * T
+            weights = np.sqrt(df["openInterest"].fillna(0).to_numpy(dtype=float) + 1)
+            coef = np.zeros(self.degree + 1)
+            if len(np.unique(k)) > self.degree:
+                coef = np.polyfit(k, w, self.degree, w=weights)
+            else:
+                # Too few strikes for a smile. Use a flat (weighted mean) variance.
+                coef[-1] = np.average(w, weights=weights)
+            expiries.append(T)
+            coefficients.append(coef)
+            k_min.append(k.min())
+            k_max.append(k.max())
+        if not expiries:
+            raise ValueError(f"No usable implied volatility quotes for {self.ticker}")
+        self.expiries = np.array(expiries)
+        self.coefficients = np.array(coefficients)
+        self.k_min = np.array(k_min)
+        self.k_max = np.array(k_max)
+
+    # ---------- Lookups ---------- #
+    def smile_variance(self, index: np.ndarray, k: np.ndarray) -> np.ndarray:
+        k = np.clip(k, self.k_min[index], self.k_max[index])
+        w = np.zeros_like(k)
+        # Horner's method with a different polynomial per element.
+        for j in range(self.degree + 1):
+            w = w * k + self.coefficients[index, j]
+        return np.maximum(w, 1e-8)
+
+    def total_variance(self, k, T) -> np.ndarray:
+        """
+        Total implied variance at log-moneyness 'k' and time 'T' (years). Vectorized.
+        """
+        k, T = np.broadcast_arrays(np.asarray(k, dtype=float), np.asarray(T, dtype=float))
+        T = np.maximum(T, 1 / 365)
+        n = len(self.expiries)
+        upper = np.searchsorted(self.expiries, T)
+        lo = np.clip(upper - 1, 0, n - 1)
+        hi = np.clip(upper, 0, n - 1)
+        t_lo = self.expiries[lo]
+        t_hi = self.expiries[hi]
+        w_lo = self.smile_variance(lo, k)
+        w_hi = self.smile_variance(hi, k)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = np.where(hi == lo, 0.0, (T - t_lo) / (t_hi - t_lo))
+        # Before the first or after the last expiry, hold that smile's volatility flat.
+        flat = w_lo * T / t_lo
+        return np.where(hi == lo, flat, w_lo + a * (w_hi - w_lo))
+
+    def implied_volatility(self, K, T) -> np.ndarray:
+        """
+        Implied volatility for arbitrary strikes and times to expiration.
+
+        Parameters
+        ----------
+        K : float | np.ndarray
+            Strike prices.
+        T : float | np.ndarray
+            Times to expiration in years. Broadcast against 'K'.
+
+        Returns
+        -------
+        np.ndarray
+            Implied volatility as a decimal.
+        """
+        T = np.maximum(np.asarray(T, dtype=float), 1 / 365)
+        k = np.log(np.asarray(K, dtype=float) / self.forward(T))
+        return np.sqrt(self.total_variance(k, T) / T)
+
+
+def get_volatility_surface(
+    ticker: str,
+    stock_price: float,
+    data_source,
+    risk_free_rate: float = 0.0,
+    snapshot: str = "",
+    expirations: list = None,
+) -> VolatilitySurface:
+    """
+    Build a surface from every listed expiration, or return the cached one.
+
+    Raw chains are cached per (ticker, snapshot), so each expiration is fetched once
+    per ticker per day. Fitted surfaces are cached per (ticker, snapshot, stock price,
+    risk-free rate, expirations); a different spot or rate refits the cached chains
+    around the new forward without fetching. Both caches drop their least recently
+    used entries past 'MAX_CHAINS' and 'MAX_SURFACES'.
+
+    Parameters
+    ----------
+    ticker : str
+        Ticker symbol.
+    stock_price : float
+        Spot price.
+    data_source
+        Object with 'options' and 'option_chain' methods (see Tools.data_source).
+    risk_free_rate : float, optional
+        Annual rate as a decimal, by default 0.0
+    snapshot : str, optional
+        Cache key date "%Y-%m-%d", by default today
+    expirations : list, optional
+        Expirations to fetch, by default all listed
+
+    Returns
+    -------
+    VolatilitySurface
+    """
+    snapshot = snapshot or dt.date.today().strftime("%Y-%m-%d")
+    key = (
+        ticker.upper(),
+        snapshot,
+        round(float(stock_price), 6),
+        round(float(risk_free_rate), 8),
+        None if expirations is None else tuple(expirations),
+    )
+    if key in _surfaces:
+        _surfaces.move_to_end(key)
+        return _surfaces[key]
+    chains = get_chains(ticker, snapshot, data_source, expirations)
+    surface = VolatilitySurface(ticker, stock_price, chains, risk_free_rate, snapshot)
+    _surfaces[key] = surface
+    while len(_surfaces) > MAX_SURFACES:
+        _surfaces.popitem(last=False)
+    return surface
+
+
+def get_chains(ticker: str, snapshot: str, data_source, expirations: list = None) -> dict:
+    """
+    Chains for 'expirations' (by default all listed), fetching only the ones not
+    already cached for this ticker and snapshot.
+    """
+    key = (ticker.upper(), snapshot)
+    entry = _chains.get(key)
+    if entry is None:
+        entry = {"listed": None, "chains": {}}
+        _chains[key] = entry
+        while len(_chains) > MAX_CHAINS:
+            _chains.popitem(last=False)
+    else:
+        _chains.move_to_end(key)
+    if expirations is None:
+        if entry["listed"] is None:
+            entry["listed"] = tuple(data_source.options(ticker))
+        expirations = entry["listed"]
+    cached = entry["chains"]
+    for e in expirations:
+        if e not in cached:
+            cached[e] = data_source.option_chain(ticker, e)
+    return {e: cached[e] for e in expirations}
+
+
+def clear_volatility_surfaces():
+    _chains.clear()
+    _surfaces.clear()
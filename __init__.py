@@ -1,10 +1,11 @@
 from Tools.options_chain import OptionsChain
 from Tools.options_backtest import OptionsBacktest
 from Tools.backtest import Backtest
-import yfinance as yf
 
 
 if __name__ == "__main__":
+    import yfinance as yf
+
     ticker = "F"
     candles = yf.download(ticker, multi_level_index=False)
     back = Backtest()